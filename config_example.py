@@ -12,6 +12,15 @@ class Config:
     VALIDATION_DELAY_MAX = 3.5
     MAX_SNAPSHOT_WAIT = 600
     
+    # Stage pipeline: bounded queue size between stages
+    PIPELINE_QUEUE_SIZE = 16
+    # Max in-flight HTTP probes in stages 4.5 and 5
+    AUDIO_PROBE_CONCURRENCY = 50
+    # Below this many uncached links, stages 4.5 and 5 probe inline instead of via asyncio
+    ASYNC_PROBE_MIN_LINKS = 3
+    # Seconds before cached stage 4.5-6 results are re-probed (live pages and "latest VOD" picks change)
+    PROBE_CACHE_EXPIRE = 7 * 24 * 3600
+    
     # NEW: Enhanced Audio sampling configuration
     MIN_SAMPLE_DURATION = 30    # Minimum 30 seconds
     MAX_SAMPLE_DURATION = 3600  # Maximum 1 hour (3600 seconds)
@@ -20,3 +29,10 @@ class Config:
     # Audio quality settings
     AUDIO_QUALITY_LEVELS = ["192", "128", "96", "64"]  # Quality fallback options
     EXTRACTION_TIMEOUT_BASE = 300  # Base timeout in seconds
+    YTDLP_WORKER_CONCURRENCY = 4  # Concurrent yt-dlp extractions in stage 6
+    YTDLP_PER_HOST_CONCURRENCY = 2  # Of those, max extractions against one host
+    YTDLP_METADATA_CONCURRENCY = 16  # Concurrent stream-metadata resolves prefetched ahead of downloads
+    YTDLP_HOST_INTERVAL = 2.0  # Min seconds between download starts on the same host
+    DENOISE_MP3_SAMPLES = False  # Also denoise stage 6 MP3s (stage 7 then gets 16 kHz WAVs); stage 8 is WAV-only by default
+    NOISE_REDUCTION_WORKERS = None  # Files denoised in parallel in stage 8 (None = CPU count)
+    FUSE_SAMPLE_STAGES = False  # Run stages 6/8/7 per sample in memory (no intermediate MP3/WAV files)
@@ -1,23 +1,56 @@
 import os
-import pandas as pd
+import asyncio
 import argparse
+import logging
 import sys
+from functools import lru_cache
 from config import Config
 from step1_validate_accounts import AccountValidator
 from step2_bright_data_trigger import BrightDataTrigger
 from step3_bright_data_download import BrightDataDownloader
 from step4_audio_filter import AudioContentFilter
-from step4_5_audio_detector import AudioContentDetector
-from step5_voice_verification import VoiceContentVerifier
-from step6_voice_sample_extractor import VoiceSampleExtractor
-from step7_advanced_voice_processor import AdvancedVoiceProcessor
-from step8_noise_reduction import NoiseReducer
 from snapshot_manager import SnapshotManager
+from utils.io_utils import write_dicts_csv
+from utils.pipeline import Pipeline
+from utils.probe_cache import open_probe_cache, url_key, cached_map
+from utils.stage_paths import StagePaths
+
+@lru_cache(maxsize=1)
+def get_audio_detector(timeout, concurrency):
+    """Stage 4.5 detector, kept (with its HTTP session) across main() calls in one process"""
+    from step4_5_audio_detector import AudioContentDetector
+    return AudioContentDetector(timeout=timeout, concurrency=concurrency)
+
+
+@lru_cache(maxsize=1)
+def get_voice_verifier(timeout, concurrency):
+    """Stage 5 verifier, kept (with its HTTP session) across main() calls in one process"""
+    from step5_voice_verification import VoiceContentVerifier
+    return VoiceContentVerifier(timeout=timeout, concurrency=concurrency)
+
+
+def process_one_sample(link_data, index, total, extractor, reducer, processor):
+    """
+    Fused stages 6 -> 8 -> 7 for one link: the sample is decoded, denoised and
+    analysed in memory, so no intermediate MP3/WAV is kept on disk.
+    """
+    samples = extractor.extract_single_array(link_data, index, total, sample_rate=reducer.sample_rate)
+    if samples is None:
+        return None
+
+    denoised = reducer.denoise_array(samples)
+    link_data['is_denoised'] = denoised is not None
+    if denoised is None:
+        denoised = samples
+
+    return processor.process_array(denoised, link_data['sample_filename'], sample_rate=reducer.sample_rate)
 
 def main(input_file, force_recheck=False):
     """Main pipeline execution - Enhanced YouTube & Twitch Voice Content Pipeline (30s-1hr samples)"""
     cfg = Config()
     os.makedirs(cfg.OUTPUT_DIR, exist_ok=True)
+    # Per-URL results of stages 4.5-6, so re-runs skip links already probed or extracted
+    probe_cache = open_probe_cache(cfg.OUTPUT_DIR)
     
     print("🎙️ ENHANCED YOUTUBE & TWITCH VOICE CONTENT PIPELINE")
     print("=" * 60)
@@ -65,6 +98,8 @@ def main(input_file, force_recheck=False):
             print("❌ Failed to create snapshot")
             return
         sm.register_snapshot(snapshot_id, valid_accounts)
+    
+    paths = StagePaths.for_snapshot(cfg.OUTPUT_DIR, snapshot_id)
 
     # Stage 3: Data Download & External Link Extraction
     print("\n⬇️ STAGE 3: Data Download & External Link Extraction")
@@ -77,18 +112,25 @@ def main(input_file, force_recheck=False):
         sm.update_snapshot_status(snapshot_id, "failed")
         return
     
+    # Drop malformed records up front instead of failing deep inside stage 4+
+    profiles = downloader.validate_profiles(profiles)
+    if not profiles:
+        print("❌ No valid profile records in snapshot data")
+        sm.update_snapshot_status(snapshot_id, "failed")
+        return
+    
     sm.update_snapshot_status(snapshot_id, "completed", profiles)
-    profiles_file = os.path.join(cfg.OUTPUT_DIR, f"2_snapshot_{snapshot_id}_results.csv")
-    pd.DataFrame(profiles).to_csv(profiles_file, index=False)
+    profiles_file = paths.profiles_csv
+    write_dicts_csv(profiles, profiles_file)
     print(f"📊 Saved {len(profiles)} profiles to: {profiles_file}")
-    
+
     links = downloader.extract_external_links(profiles)
     if not links:
         print("🔗 No external links found in profiles")
         return
         
-    links_file = os.path.join(cfg.OUTPUT_DIR, f"3_snapshot_{snapshot_id}_external_links.csv")
-    pd.DataFrame(links).to_csv(links_file, index=False)
+    links_file = paths.links_csv
+    write_dicts_csv(links, links_file)
     print(f"🔗 Saved {len(links)} external links to: {links_file}")
 
     # Stage 4: YouTube & Twitch Audio Platform Filtering
@@ -101,71 +143,205 @@ def main(input_file, force_recheck=False):
         print("🔍 No YouTube or Twitch links found")
         return
         
-    audio_file = os.path.join(cfg.OUTPUT_DIR, f"4_snapshot_{snapshot_id}_audio_links.csv")
-    pd.DataFrame(audio_links).to_csv(audio_file, index=False)
+    audio_file = paths.audio_links_csv
+    write_dicts_csv(audio_links, audio_file)
     print(f"🎯 Found {len(audio_links)} YouTube/Twitch audio links!")
 
     # Stage 4.5: Audio Content Detection
     print("\n🎵 STAGE 4.5: YouTube & Twitch Audio Content Detection")
     print("-" * 60)
-    audio_detector = AudioContentDetector(timeout=10)
-    audio_detected_links = audio_detector.detect_audio_content(audio_links)
+    # Stages 4.5+ pull in aiohttp, yt-dlp, numpy and speech_recognition; import
+    # them only once a run actually gets that far
+    audio_detector = get_audio_detector(10, cfg.AUDIO_PROBE_CONCURRENCY)
+    
+    def detect_audio(misses):
+        # A handful of links is cheaper to probe inline than to start an event loop and session
+        if len(misses) < cfg.ASYNC_PROBE_MIN_LINKS:
+            for link in misses:
+                audio_detector.detect_link(link)
+        else:
+            asyncio.run(audio_detector.detect_audio_content_async(misses))
+    
+    # Video/VOD/clip URLs are audio by construction; only probe the ambiguous rest
+    uncertain_links = []
+    for link in audio_links:
+        if audio_detector.implies_audio(link['url']):
+            audio_detector.mark_implied_audio(link)
+        else:
+            uncertain_links.append(link)
+    print(f"⚡ {len(audio_links) - len(uncertain_links)} links imply audio from their URL, "
+          f"probing {len(uncertain_links)}")
+    
+    cached_map(
+        detect_audio,
+        uncertain_links, probe_cache,
+        key_fn=lambda link: url_key("audio", link['url']),
+        fields=audio_detector.RESULT_FIELDS,
+        validate=lambda hit: 'error' not in hit['detection_status'],
+        label="Audio detection",
+        expire=cfg.PROBE_CACHE_EXPIRE
+    )
+    audio_detected_links = [link for link in audio_links if link.get('has_audio')]
     
     if not audio_detected_links:
         print("🔍 No audio content detected")
         return
         
-    audio_detected_file = os.path.join(cfg.OUTPUT_DIR, f"4_5_snapshot_{snapshot_id}_audio_detected.csv")
-    pd.DataFrame(audio_detected_links).to_csv(audio_detected_file, index=False)
+    audio_detected_file = paths.audio_detected_csv
+    write_dicts_csv(audio_detected_links, audio_detected_file)
     print(f"🎵 Found {len(audio_detected_links)} links with actual audio content!")
 
     # Stage 5: Voice Content Verification
     print("\n🎙️ STAGE 5: YouTube & Twitch Voice Content Verification")
     print("-" * 60)
-    voice_verifier = VoiceContentVerifier(timeout=15)
-    verified_links = voice_verifier.verify_voice_content(audio_detected_links)
+    voice_verifier = get_voice_verifier(15, cfg.AUDIO_PROBE_CONCURRENCY)
+    
+    def verify_voice(misses):
+        if len(misses) < cfg.ASYNC_PROBE_MIN_LINKS:
+            voice_verifier.verify_voice_content(misses)
+        else:
+            asyncio.run(voice_verifier.verify_voice_content_async(misses))
     
-    verified_file = os.path.join(cfg.OUTPUT_DIR, f"5_snapshot_{snapshot_id}_verified_voice.csv")
-    pd.DataFrame(verified_links).to_csv(verified_file, index=False)
+    checked_links = cached_map(
+        verify_voice,
+        audio_detected_links, probe_cache,
+        key_fn=lambda link: url_key("voice", link['url'], link.get('audio_type')),
+        fields=voice_verifier.RESULT_FIELDS,
+        validate=lambda hit: 'error' not in hit['verification_status'],
+        label="Voice verification",
+        expire=cfg.PROBE_CACHE_EXPIRE
+    )
+    verified_links = [link for link in checked_links if 'has_voice' in link]
+    
+    verified_file = paths.verified_voice_csv
+    write_dicts_csv(verified_links, verified_file)
     
     confirmed_voice = [link for link in verified_links if link.get('has_voice')]
     if confirmed_voice:
-        confirmed_file = os.path.join(cfg.OUTPUT_DIR, f"5_snapshot_{snapshot_id}_confirmed_voice.csv")
-        pd.DataFrame(confirmed_voice).to_csv(confirmed_file, index=False)
+        confirmed_file = paths.confirmed_voice_csv
+        write_dicts_csv(confirmed_voice, confirmed_file)
         print(f"🎙️ Found {len(confirmed_voice)} confirmed voice content links!")
     else:
         print("❌ No voice content confirmed after verification")
         confirmed_voice = []
 
-    # Stage 6: Enhanced Voice Sample Extraction (30s-1hr samples)
-    print("\n🎤 STAGE 6: Enhanced Voice Sample Extraction (30s-1hr samples)")
+    # Stage 6 + 8: Voice Sample Extraction overlapped with Noise Reduction.
+    # Each sample is denoised as soon as it is downloaded, so CPU-bound ffmpeg
+    # filtering runs while the next yt-dlp downloads are still in flight.
+    print("\n🎤 STAGE 6 + 8: Voice Sample Extraction (30s-1hr) with Background Noise Reduction")
     print("-" * 60)
     
     if confirmed_voice:
+        from step6_voice_sample_extractor import VoiceSampleExtractor
+        from step7_advanced_voice_processor import AdvancedVoiceProcessor
+        from step8_noise_reduction import NoiseReducer
+        
         sample_extractor = VoiceSampleExtractor(
-            output_dir=os.path.join(cfg.OUTPUT_DIR, "voice_samples"),
+            output_dir=paths.voice_samples_dir,
             min_duration=cfg.MIN_SAMPLE_DURATION,  # 30 seconds minimum
             max_duration=cfg.MAX_SAMPLE_DURATION,  # 1 hour maximum
-            quality="192"
+            quality="192",
+            max_workers=cfg.YTDLP_WORKER_CONCURRENCY,
+            per_host_limit=cfg.YTDLP_PER_HOST_CONCURRENCY,
+            metadata_workers=cfg.YTDLP_METADATA_CONCURRENCY,
+            host_interval=cfg.YTDLP_HOST_INTERVAL
         )
-        
-        extracted_samples = sample_extractor.extract_voice_samples(confirmed_voice)
+        noise_reducer = NoiseReducer(
+            output_dir=paths.voice_analysis_dir,
+            mode="quick",
+            sample_rate=16000,
+            workers=cfg.NOISE_REDUCTION_WORKERS
+        )
+        processor = AdvancedVoiceProcessor(
+            output_dir=paths.voice_analysis_dir,
+            min_voice_confidence=0.6,
+            voice_segment_min_length=2.0
+        )
+        # Identical URLs are extracted once and their results shared afterwards
+        voice_groups = sample_extractor.group_duplicate_links(confirmed_voice)
+        unique_voice = [group[0] for group in voice_groups]
+        total_links = len(unique_voice)
+        nr_results = []
+        fused_results = []
+
+        def sample_key(link):
+            return url_key("sample", link.get('url', ''))
+
+        def sample_hit_valid(hit):
+            return hit['sample_extracted'] and os.path.exists(hit['sample_file'] or '')
+
+        def extract_sample(indexed_link):
+            i, link_data = indexed_link
+            cached_map(
+                lambda misses: sample_extractor.extract_single(misses[0], i, total_links),
+                [link_data], probe_cache,
+                key_fn=sample_key,
+                fields=VoiceSampleExtractor.RESULT_FIELDS,
+                validate=sample_hit_valid,
+                expire=cfg.PROBE_CACHE_EXPIRE
+            )
+            return link_data if link_data.get('sample_extracted') else None
+
+        def denoise_sample(sample):
+            # Stage 8 is WAV-only; stage 6 MP3s are passed to stage 7 as-is unless opted in
+            if sample['sample_file'].endswith('.wav') or cfg.DENOISE_MP3_SAMPLES:
+                nr_results.append(noise_reducer.process_file(sample['sample_file']))
+            return sample
+
+        def fuse_sample(indexed_link):
+            i, link_data = indexed_link
+            result = process_one_sample(link_data, i, total_links, sample_extractor, noise_reducer, processor)
+            if result:
+                fused_results.append(result)
+            return link_data if link_data.get('sample_extracted') else None
+
+        # Resolve stream metadata for every link that will actually be extracted
+        # up front, so downloads never wait on it
+        if cfg.FUSE_SAMPLE_STAGES:
+            sample_extractor.prefetch_media(unique_voice)
+        else:
+            cached_hits = [probe_cache.get(sample_key(link)) for link in unique_voice]
+            sample_extractor.prefetch_media([
+                link for link, hit in zip(unique_voice, cached_hits)
+                if hit is None or not sample_hit_valid(hit)
+            ])
+
+        pipeline = Pipeline(enumerate(unique_voice, 1), queue_size=cfg.PIPELINE_QUEUE_SIZE)
+        if cfg.FUSE_SAMPLE_STAGES:
+            # Stages 6/8/7 per sample in memory; only voice-only WAVs are written
+            print("🧩 Fused mode: extracting, denoising and analysing each sample in memory")
+            pipeline.then_process(fuse_sample, workers=cfg.YTDLP_WORKER_CONCURRENCY)
+        else:
+            (pipeline
+             .then_process(extract_sample, workers=cfg.YTDLP_WORKER_CONCURRENCY)
+             .then_process(denoise_sample, workers=noise_reducer.workers))
+        try:
+            pipeline.run()
+        finally:
+            # Stages 8/7 don't need the extractor; free its metadata pool now
+            sample_extractor.close()
+        extracted_samples = [
+            link for link in sample_extractor.share_group_results(voice_groups)
+            if link.get('sample_extracted')
+        ]
+        # Computed once and shared by the summaries, the report and the final summary
+        duration_stats = sample_extractor.sample_stats(extracted_samples)
+        sample_extractor.print_extraction_summary(extracted_samples, len(confirmed_voice), stats=duration_stats)
         
         if extracted_samples:
-            extraction_file = os.path.join(cfg.OUTPUT_DIR, f"6_snapshot_{snapshot_id}_voice_samples.csv")
-            pd.DataFrame(extracted_samples).to_csv(extraction_file, index=False)
+            extraction_file = paths.voice_samples_csv
+            write_dicts_csv(extracted_samples, extraction_file)
             
-            report_file = sample_extractor.generate_samples_report(extracted_samples)
+            report_file = sample_extractor.generate_samples_report(extracted_samples, stats=duration_stats)
             
             # Show enhanced summary
-            durations = [sample.get('actual_duration', 0) for sample in extracted_samples]
-            total_hours = sum(durations) / 3600
+            total_hours = duration_stats['total'] / 3600
             
             print(f"\n🎤 Enhanced Voice Sample Extraction Summary:")
             print(f" 📊 Total voice links: {len(confirmed_voice)}")
             print(f" ✅ Successful extractions: {len(extracted_samples)}")
             print(f" ⏱️ Total audio extracted: {total_hours:.2f} hours")
-            print(f" 📊 Average sample duration: {sum(durations)/len(durations):.1f} seconds")
+            print(f" 📊 Average sample duration: {duration_stats['average']:.1f} seconds")
             print(f" 📁 Samples directory: {sample_extractor.output_dir}")
             print(f" 📄 Report file: {report_file}")
         else:
@@ -175,32 +351,29 @@ def main(input_file, force_recheck=False):
         print("⏭️ Skipping voice sample extraction - no confirmed voice content")
         extracted_samples = []
 
-    # Stage 8: Background Noise Reduction
+    # Stage 8: Background Noise Reduction (files were denoised inside the stage 6 pipeline)
     print("\n🎛️ STAGE 8: Background Noise Reduction")
     print("-" * 60)
     
-    if extracted_samples:
-        samples_dir = os.path.join(cfg.OUTPUT_DIR, "voice_samples")
-        noise_reducer = NoiseReducer(
-            output_dir=os.path.join(cfg.OUTPUT_DIR, "voice_analysis"),
-            mode="quick",
-            sample_rate=16000
-        )
-        
-        nr_results = noise_reducer.process_directory(samples_dir)
+    if extracted_samples and cfg.FUSE_SAMPLE_STAGES:
+        successful_denoising = sum(1 for sample in extracted_samples if sample.get('is_denoised'))
+        print(f"✅ Noise reduction completed: {successful_denoising} samples denoised in memory")
+    elif extracted_samples:
         successful_denoising = sum(1 for r in nr_results if r.get('output_file'))
         
         print(f"✅ Noise reduction completed: {successful_denoising} files denoised")
         
         # Update sample paths to point to denoised files
-        denoised_dir = os.path.join(cfg.OUTPUT_DIR, "voice_analysis", "denoised_audio")
+        denoised_dir = noise_reducer.denoised_dir
+        # One directory read instead of a stat() per sample
+        with os.scandir(denoised_dir) as entries:
+            existing = {entry.name for entry in entries if entry.is_file()}
         for sample in extracted_samples:
             orig_path = sample.get('sample_file', '')
             if orig_path:
-                base_name = os.path.splitext(os.path.basename(orig_path))[0]
-                denoised_path = os.path.join(denoised_dir, f"{base_name}_denoised.wav")
-                if os.path.exists(denoised_path):
-                    sample['sample_file'] = denoised_path
+                denoised_name = f"{os.path.splitext(os.path.basename(orig_path))[0]}_denoised.wav"
+                if denoised_name in existing:
+                    sample['sample_file'] = os.path.join(denoised_dir, denoised_name)
                     sample['is_denoised'] = True
     else:
         print("⏭️ Skipping noise reduction - no extracted samples")
@@ -210,32 +383,21 @@ def main(input_file, force_recheck=False):
     print("-" * 60)
     
     if extracted_samples:
-        processor = AdvancedVoiceProcessor(
-            output_dir=os.path.join(cfg.OUTPUT_DIR, "voice_analysis"),
-            min_voice_confidence=0.6,
-            voice_segment_min_length=2.0
-        )
-        
-        # Create temporary directory for processing
-        temp_audio_dir = os.path.join(cfg.OUTPUT_DIR, "temp_audio_for_processing")
-        os.makedirs(temp_audio_dir, exist_ok=True)
-        
-        # Copy audio files to temp directory
-        import shutil
-        for sample in extracted_samples:
-            sample_file = sample.get('sample_file')
-            if sample_file and os.path.exists(sample_file):
-                dest_file = os.path.join(temp_audio_dir, os.path.basename(sample_file))
-                if not os.path.exists(dest_file):
-                    shutil.copy2(sample_file, dest_file)
-        
-        voice_only_results = processor.process_audio_directory(temp_audio_dir)
+        if cfg.FUSE_SAMPLE_STAGES:
+            # Already analysed inside the fused stage 6 pipeline
+            voice_only_results = fused_results
+        else:
+            # Process the (denoised) sample files where they are; no staging copy needed
+            sample_files = list(dict.fromkeys(
+                sample['sample_file'] for sample in extracted_samples if sample.get('sample_file')
+            ))
+            voice_only_results = processor.process_audio_files(sample_files)
         
         if voice_only_results:
             results_file = processor.save_results(voice_only_results)
             report_file = processor.generate_report(voice_only_results)
             
-            voice_only_file = os.path.join(cfg.OUTPUT_DIR, f"7_snapshot_{snapshot_id}_voice_only.csv")
+            voice_only_file = paths.voice_only_csv
             simplified_results = []
             
             for result in voice_only_results:
@@ -249,7 +411,7 @@ def main(input_file, force_recheck=False):
                     'voice_duration': result.get('voice_duration', 0)
                 })
             
-            pd.DataFrame(simplified_results).to_csv(voice_only_file, index=False)
+            write_dicts_csv(simplified_results, voice_only_file)
             
             print(f"🔍 Advanced Voice Processing Summary:")
             print(f" 📊 Total audio samples: {len(extracted_samples)}")
@@ -259,10 +421,6 @@ def main(input_file, force_recheck=False):
         else:
             print("❌ No voice-only content found after filtering")
             voice_only_samples = []
-        
-        # Cleanup temp directory
-        if os.path.exists(temp_audio_dir):
-            shutil.rmtree(temp_audio_dir)
     else:
         print("⏭️ Skipping advanced voice processing - no audio samples")
         voice_only_samples = []
@@ -278,11 +436,8 @@ def main(input_file, force_recheck=False):
     print(f"✅ Voice-only samples (filtered): {len(voice_only_samples) if voice_only_samples else 0}")
     
     if extracted_samples:
-        total_hours = sum(sample.get('actual_duration', 0) for sample in extracted_samples) / 3600
-        print(f"⏱️ Total audio extracted: {total_hours:.2f} hours")
-        
-        duration_stats = [sample.get('actual_duration', 0) for sample in extracted_samples]
-        print(f"📊 Duration range: {min(duration_stats)}s - {max(duration_stats)}s")
+        print(f"⏱️ Total audio extracted: {duration_stats['total'] / 3600:.2f} hours")
+        print(f"📊 Duration range: {duration_stats['shortest']:.0f}s - {duration_stats['longest']:.0f}s")
     
     print(f"🆔 Snapshot ID: {snapshot_id}")
     print(f"📁 Results saved in: {cfg.OUTPUT_DIR}")
@@ -295,6 +450,9 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
+    # Stage modules log per-link progress; show it on stdout as bare lines, like the prints around it
+    logging.basicConfig(level=logging.INFO, format='%(message)s', handlers=[logging.StreamHandler(sys.stdout)])
+    
     if not os.path.exists(args.input_file):
         print(f"❌ Input file not found: {args.input_file}")
         sys.exit(1)
@@ -9,10 +9,16 @@ from datetime import datetime
 from typing import List, Dict, Optional
 
 class SnapshotManager:
+    # Fold the append-only event log into the registry file after this many events
+    COMPACT_EVERY = 100
+
     def __init__(self, output_dir: str = "output/"):
         self.output_dir = output_dir
         self.snapshots_dir = os.path.join(output_dir, "snapshots")
         self.registry_file = os.path.join(self.snapshots_dir, "snapshot_registry.json")
+        # Status changes are appended here and replayed over the registry on load
+        self.events_file = os.path.join(self.snapshots_dir, "snapshots.jsonl")
+        self._pending_events = 0
         
         # Create snapshots directory
         os.makedirs(self.snapshots_dir, exist_ok=True)
@@ -110,7 +116,7 @@ class SnapshotManager:
         
         # Add to registry
         self.registry[snapshot_id] = metadata
-        self._save_registry()
+        self._append_event(snapshot_id, metadata)
         
         print(f"📝 Snapshot {snapshot_id} registered with {len(accounts)} accounts")
         print(f"📁 Accounts saved: {accounts_file}")
@@ -125,12 +131,14 @@ class SnapshotManager:
             print(f"⚠️ Snapshot {snapshot_id} not found in registry")
             return
         
-        self.registry[snapshot_id]['status'] = status
-        self.registry[snapshot_id]['completed_at'] = datetime.now().isoformat()
+        changes = {
+            'status': status,
+            'completed_at': datetime.now().isoformat()
+        }
         
         if results_data:
-            self.registry[snapshot_id]['results_count'] = len(results_data)
-            self.registry[snapshot_id]['success_rate'] = (
+            changes['results_count'] = len(results_data)
+            changes['success_rate'] = (
                 len(results_data) / self.registry[snapshot_id]['total_accounts'] * 100
             )
             
@@ -138,14 +146,16 @@ class SnapshotManager:
             results_file = os.path.join(self.snapshots_dir, f"{snapshot_id}_results_sample.json")
             with open(results_file, 'w') as f:
                 json.dump(results_data[:5], f, indent=2)  # Save first 5 records as sample
-            self.registry[snapshot_id]['results_sample_file'] = results_file
+            changes['results_sample_file'] = results_file
+        
+        self.registry[snapshot_id].update(changes)
         
         # Update individual metadata file
         metadata_file = os.path.join(self.snapshots_dir, f"{snapshot_id}_metadata.json")
         with open(metadata_file, 'w') as f:
             json.dump(self.registry[snapshot_id], f, indent=2)
         
-        self._save_registry()
+        self._append_event(snapshot_id, changes)
         print(f"📊 Snapshot {snapshot_id} status updated: {status}")
     
     def get_snapshot_info(self, snapshot_id: str) -> Optional[Dict]:
@@ -355,23 +365,63 @@ class SnapshotManager:
         return stats
     
     def _load_registry(self) -> Dict:
-        """Load existing registry"""
+        """Load the compacted registry and replay the event log on top of it"""
+        registry = {}
         if os.path.exists(self.registry_file):
             try:
                 with open(self.registry_file, 'r') as f:
                     registry = json.load(f)
-                print(f"📚 Loaded {len(registry)} snapshots from registry")
-                return registry
             except Exception as e:
                 print(f"⚠️ Error loading registry: {e}")
-                return {}
-        return {}
+        
+        if os.path.exists(self.events_file):
+            with open(self.events_file, 'r+b') as f:
+                data = f.read()
+                if data and not data.endswith(b"\n"):
+                    # Torn last line from an interrupted run: cut it off so the
+                    # next append starts on a fresh line instead of extending it
+                    data = data[:data.rfind(b"\n") + 1]
+                    f.truncate(len(data))
+                    print("⚠️ Dropped an incomplete last entry from the registry event log")
+            
+            for line in data.decode('utf-8', errors='replace').splitlines():
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                registry.setdefault(event['snapshot_id'], {}).update(event['changes'])
+                self._pending_events += 1
+        
+        if registry:
+            print(f"📚 Loaded {len(registry)} snapshots from registry")
+        
+        if self._pending_events >= self.COMPACT_EVERY:
+            self.registry = registry
+            self._save_registry()
+        return registry
+    
+    def _append_event(self, snapshot_id: str, changes: Dict):
+        """Record a registry change as one appended line instead of rewriting the registry"""
+        try:
+            with open(self.events_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'snapshot_id': snapshot_id, 'changes': changes}, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"❌ Error saving registry event: {e}")
+            return
+        
+        self._pending_events += 1
+        if self._pending_events >= self.COMPACT_EVERY:
+            self._save_registry()
     
     def _save_registry(self):
-        """Save registry to file"""
+        """Compact: write the full registry atomically, then truncate the event log"""
         try:
-            with open(self.registry_file, 'w') as f:
+            tmp_file = self.registry_file + ".tmp"
+            with open(tmp_file, 'w') as f:
                 json.dump(self.registry, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, self.registry_file)
+            open(self.events_file, 'w').close()
+            self._pending_events = 0
         except Exception as e:
             print(f"❌ Error saving registry: {e}")
 
@@ -1,7 +1,7 @@
 import requests
 import time
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 class BrightDataDownloader:
     def __init__(self, api_token: str):
@@ -190,6 +190,33 @@ class BrightDataDownloader:
                     print(f"❌ No valid JSON found in {len(lines)} lines")
                     return []
 
+    def validate_profiles(self, profiles: List) -> List[Dict]:
+        """
+        Single-pass check run before anything is written or processed.
+        
+        Downstream stages only need each record to be a dict (every field is
+        read with .get), so null and non-object records are dropped and reported
+        instead of failing the whole snapshot.
+        
+        Returns:
+            The usable profile records
+        """
+        valid = []
+        invalid = []
+        
+        for index, profile in enumerate(profiles):
+            if isinstance(profile, dict):
+                valid.append(profile)
+            else:
+                invalid.append((index, "null record" if profile is None else f"not an object ({type(profile).__name__})"))
+        
+        if invalid:
+            print(f"⚠️ Dropped {len(invalid)} of {len(profiles)} malformed profile records")
+            for index, reason in invalid[:3]:
+                print(f"  • record {index}: {reason}")
+        
+        return valid
+
     def extract_external_links(self, profiles: List[Dict]) -> List[Dict]:
         """Extract external links from profiles with None-safe handling"""
         if not profiles:
@@ -198,40 +225,48 @@ class BrightDataDownloader:
         external_links = []
         
         for profile in profiles:
-            if not profile:  # Skip if profile is None
-                continue
-                
-            username = profile.get('username') or profile.get('screen_name', '')
-            
-            # Search for external links in various fields
-            link_fields = ['external_link', 'url', 'website', 'profile_external_link', 'bio_link']
-            
-            found_link = None
-            for field in link_fields:
-                link = profile.get(field)
-                
-                # Safe None handling
-                if link is None:
-                    link = ''
-                else:
-                    link = str(link).strip()  # Convert to string and strip
-                
-                if link and link.startswith('http'):
-                    found_link = link
-                    break
-            
-            if found_link:
-                # Safe handling for description field too
-                description = profile.get('description')
-                bio = description[:100] if description else ''
-                
-                external_links.append({
-                    'username': username,
-                    'profile_name': profile.get('profile_name', ''),
-                    'url': found_link,
-                    'followers': profile.get('followers', 0),
-                    'bio': bio
-                })
+            link = self.extract_link(profile)
+            if link:
+                external_links.append(link)
         
         print(f"🔗 Extracted {len(external_links)} external links from {len(profiles)} profiles")
         return external_links
+
+    def extract_link(self, profile: Dict) -> Optional[Dict]:
+        """Extract the external link record for a single profile, or None if it has none"""
+        if not profile:  # Skip if profile is None
+            return None
+            
+        username = profile.get('username') or profile.get('screen_name', '')
+        
+        # Search for external links in various fields
+        link_fields = ['external_link', 'url', 'website', 'profile_external_link', 'bio_link']
+        
+        found_link = None
+        for field in link_fields:
+            link = profile.get(field)
+            
+            # Safe None handling
+            if link is None:
+                link = ''
+            else:
+                link = str(link).strip()  # Convert to string and strip
+            
+            if link and link.startswith('http'):
+                found_link = link
+                break
+        
+        if not found_link:
+            return None
+            
+        # Safe handling for description field too
+        description = profile.get('description')
+        bio = description[:100] if description else ''
+        
+        return {
+            'username': username,
+            'profile_name': profile.get('profile_name', ''),
+            'url': found_link,
+            'followers': profile.get('followers', 0),
+            'bio': bio
+        }
@@ -1,16 +1,101 @@
+import asyncio
+import aiohttp
 import requests
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional
 from urllib.parse import urlparse
 import time
 
+def classify_youtube_content(content: str) -> str:
+    """Classify YouTube content type for better voice detection"""
+    
+    # Высокая вероятность голосового контента
+    if any(keyword in content for keyword in [
+        'podcast', 'interview', 'talk', 'discussion', 'conversation'
+    ]):
+        return 'speech_content'
+    
+    # Образовательный контент (часто голосовой)
+    elif any(keyword in content for keyword in [
+        'tutorial', 'lecture', 'explanation', 'review', 'analysis'
+    ]):
+        return 'educational_content'
+    
+    # Музыкальный контент
+    elif any(keyword in content for keyword in [
+        'music', 'song', 'album', 'artist', 'band', 'mv', 'official video'
+    ]):
+        return 'music_content'
+    
+    # Игровой контент
+    elif any(keyword in content for keyword in [
+        'gameplay', 'gaming', 'game', 'let\'s play', 'walkthrough'
+    ]):
+        return 'gaming_content'
+    
+    else:
+        return 'mixed_content'
+
+
+def classify_twitch_content(url: str, content: str) -> str:
+    """Classify Twitch stream type"""
+    
+    # Just Chatting - высокая вероятность голоса
+    if 'just chatting' in content or 'justchatting' in content:
+        return 'just_chatting'
+    
+    # Talk shows и подкасты
+    elif any(keyword in content for keyword in [
+        'talk show', 'podcast', 'interview', 'discussion'
+    ]):
+        return 'talk_show'
+    
+    # Gaming с комментариями
+    elif any(keyword in content for keyword in [
+        'gaming', 'gameplay', 'playing'
+    ]) and any(keyword in content for keyword in [
+        'commentary', 'talking', 'chat'
+    ]):
+        return 'gaming_with_commentary'
+    
+    else:
+        return 'general_stream'
+
+
+def twitch_audio_type(url: str, content: str) -> str:
+    """audio_type a Twitch probe assigns to this lowercased page (see _twitch_audio_result)"""
+    return {
+        'just_chatting': 'live_talk',
+        'talk_show': 'talk_show',
+        'gaming_with_commentary': 'gaming_commentary'
+    }.get(classify_twitch_content(url, content), 'twitch_stream')
+
+
 class AudioContentDetector:
-    def __init__(self, timeout=10):
+    # Fields added to each link by detection
+    RESULT_FIELDS = ('has_audio', 'audio_confidence', 'audio_type', 'detection_status')
+
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (compatible; AudioBot/1.0)'
+    }
+
+    # Single videos, VODs and clips always carry an audio track; only channel
+    # pages, short links and other ambiguous URLs need an HTTP probe
+    IMPLIED_AUDIO_RE = re.compile(
+        r'^https?://(?:www\.|m\.)?(?:'
+        r'youtube\.com/(?:watch\?(?:[^#]*&)?v=|shorts/|live/)[\w-]{6,}'
+        r'|youtu\.be/[\w-]{6,}'
+        r'|twitch\.tv/(?:videos/\d+|\w+/clip/[\w-]+)'
+        r'|clips\.twitch\.tv/[\w-]+'
+        r')',
+        re.IGNORECASE
+    )
+
+    def __init__(self, timeout=10, concurrency=50):
         self.timeout = timeout
+        self.concurrency = concurrency  # Max in-flight probes for the async path
         self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (compatible; AudioBot/1.0)'
-        })
+        self.session.headers.update(self.HEADERS)
 
     def detect_audio_content(self, audio_links: List[Dict]) -> List[Dict]:
         """Detect audio in YouTube and Twitch links only"""
@@ -33,188 +118,233 @@ class AudioContentDetector:
                 
             print(f"🔍 [{i}/{len(audio_links)}] {platform.upper()} check {username}: {url[:50]}...")
             
-            if platform == 'youtube':
-                audio_result = self._detect_youtube_audio(url)
-            elif platform == 'twitch':
-                audio_result = self._detect_twitch_audio(url)
-            else:
+            if self.detect_link(link_data) is None:
                 continue  # Пропускаем неподдерживаемые платформы
             
-            # Add audio detection results
-            link_data.update({
-                'has_audio': audio_result['has_audio'],
-                'audio_confidence': audio_result['confidence'],
-                'audio_type': audio_result.get('audio_type'),
-                'detection_status': audio_result['status']
-            })
-            
-            if audio_result['has_audio']:
+            if link_data['has_audio']:
                 audio_detected_links.append(link_data)
             
             time.sleep(0.5)  # Небольшая задержка
         
-        confirmed_audio = len(audio_detected_links)
+        self._print_detection_summary(len(audio_links), len(audio_detected_links))
+        return audio_detected_links
+
+    async def detect_audio_content_async(self, audio_links: List[Dict]) -> List[Dict]:
+        """Detect audio in YouTube and Twitch links, probing up to `concurrency` links at once"""
         
-        print(f"\n🎵 YouTube & Twitch audio detection completed!")
-        print(f"📊 Total links checked: {len(audio_links)}")
-        print(f"✅ Audio content found: {confirmed_audio}")
-        print(f"❌ No audio detected: {len(audio_links) - confirmed_audio}")
+        if not audio_links:
+            print("🔍 No audio links to detect")
+            return []
+
+        print(f"🎵 Starting YouTube & Twitch audio detection for {len(audio_links)} links "
+              f"({self.concurrency} in flight)...")
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.HEADERS) as session:
+            results = await asyncio.gather(*[
+                self._detect_link_async(session, semaphore, link_data) for link_data in audio_links
+            ])
+        
+        audio_detected_links = [link for link in results if link and link['has_audio']]
         
+        self._print_detection_summary(len(audio_links), len(audio_detected_links))
         return audio_detected_links
 
+    def detect_link(self, link_data: Dict) -> Optional[Dict]:
+        """
+        Run audio detection for a single link and annotate it in place.
+        
+        Returns:
+            The annotated link, or None for links without URL or unsupported platforms
+        """
+        url = link_data.get('url', '')
+        platform = link_data.get('platform_type', 'unknown')
+        
+        if not url:
+            return None
+        
+        if platform == 'youtube':
+            audio_result = self._detect_youtube_audio(url)
+        elif platform == 'twitch':
+            audio_result = self._detect_twitch_audio(url)
+        else:
+            return None
+        
+        self._annotate(link_data, audio_result)
+        return link_data
+
+    async def _detect_link_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                 link_data: Dict) -> Optional[Dict]:
+        """Async counterpart of detect_link sharing the same classification logic"""
+        url = link_data.get('url', '')
+        platform = link_data.get('platform_type', 'unknown')
+        
+        if not url or platform not in ('youtube', 'twitch'):
+            return None
+        
+        content, error = '', None
+        async with semaphore:
+            try:
+                async with session.get(url) as response:
+                    content = (await response.text(errors='replace')).lower()
+            except Exception as e:
+                error = e
+        
+        if platform == 'youtube':
+            audio_result = self._youtube_audio_error(error) if error else self._youtube_audio_result(content)
+        else:
+            audio_result = self._twitch_audio_error(error) if error else self._twitch_audio_result(url, content)
+        
+        self._annotate(link_data, audio_result)
+        return link_data
+
+    def implies_audio(self, url: str) -> bool:
+        """True if the URL itself guarantees audio content, so no probe is needed"""
+        return bool(self.IMPLIED_AUDIO_RE.match(url or ''))
+
+    def mark_implied_audio(self, link_data: Dict) -> Dict:
+        """Annotate a link whose URL implies audio without probing it"""
+        self._annotate(link_data, {
+            'has_audio': True,
+            'confidence': 'high',
+            'audio_type': 'platform_implied',
+            'status': f"{link_data.get('platform_type', 'unknown')}_url_implies_audio"
+        })
+        return link_data
+
+    def _annotate(self, link_data: Dict, audio_result: Dict):
+        """Add audio detection results"""
+        link_data.update({
+            'has_audio': audio_result['has_audio'],
+            'audio_confidence': audio_result['confidence'],
+            'audio_type': audio_result.get('audio_type'),
+            'detection_status': audio_result['status']
+        })
+
+    def _print_detection_summary(self, total: int, confirmed_audio: int):
+        print(f"\n🎵 YouTube & Twitch audio detection completed!")
+        print(f"📊 Total links checked: {total}")
+        print(f"✅ Audio content found: {confirmed_audio}")
+        print(f"❌ No audio detected: {total - confirmed_audio}")
+
     def _detect_youtube_audio(self, url: str) -> Dict:
         """Enhanced YouTube audio detection"""
         try:
             response = self.session.get(url, timeout=self.timeout)
-            content = response.text.lower()
-            
-            # YouTube аудио-индикаторы
-            strong_audio_indicators = [
-                '"hasaudio":true',
-                '"audiotrack"',
-                'itag.*?audio',
-                'audio/.*?webm',
-                'audio/.*?mp4'
-            ]
-            
-            found_indicators = []
-            for pattern in strong_audio_indicators:
-                if re.search(pattern, content, re.IGNORECASE):
-                    found_indicators.append(pattern)
-            
-            # Дополнительные проверки
-            has_video_element = '<video' in content or 'video' in content
-            has_audio_mention = 'audio' in content and ('track' in content or 'stream' in content)
-            
-            # Определяем тип контента (важно для голосовой проверки)
-            content_type = self._classify_youtube_content(content)
-            
-            # Логика принятия решения
-            if len(found_indicators) >= 2:
-                confidence = 'high'
-                has_audio = True
-            elif len(found_indicators) >= 1 or (has_video_element and has_audio_mention):
-                confidence = 'medium'
-                has_audio = True
-            elif has_video_element:  # YouTube видео обычно имеют аудио
-                confidence = 'medium'
-                has_audio = True
-            else:
-                confidence = 'low'
-                has_audio = False
-                
-            return {
-                'has_audio': has_audio,
-                'confidence': confidence,
-                'audio_type': content_type,
-                'status': f'youtube_audio: {len(found_indicators)} indicators, {content_type}'
-            }
-            
+            return self._youtube_audio_result(response.text.lower())
         except Exception as e:
-            return {
-                'has_audio': True,  # Предполагаем наличие аудио в YouTube по умолчанию
-                'confidence': 'medium',
-                'audio_type': 'youtube_default',
-                'status': f'youtube_error_default_true: {str(e)}'
-            }
+            return self._youtube_audio_error(e)
+
+    def _youtube_audio_result(self, content: str) -> Dict:
+        """Decide on audio presence from a lowercased YouTube page"""
+        # YouTube аудио-индикаторы
+        strong_audio_indicators = [
+            '"hasaudio":true',
+            '"audiotrack"',
+            'itag.*?audio',
+            'audio/.*?webm',
+            'audio/.*?mp4'
+        ]
+        
+        found_indicators = []
+        for pattern in strong_audio_indicators:
+            if re.search(pattern, content, re.IGNORECASE):
+                found_indicators.append(pattern)
+        
+        # Дополнительные проверки
+        has_video_element = '<video' in content or 'video' in content
+        has_audio_mention = 'audio' in content and ('track' in content or 'stream' in content)
+        
+        # Определяем тип контента (важно для голосовой проверки)
+        content_type = self._classify_youtube_content(content)
+        
+        # Логика принятия решения
+        if len(found_indicators) >= 2:
+            confidence = 'high'
+            has_audio = True
+        elif len(found_indicators) >= 1 or (has_video_element and has_audio_mention):
+            confidence = 'medium'
+            has_audio = True
+        elif has_video_element:  # YouTube видео обычно имеют аудио
+            confidence = 'medium'
+            has_audio = True
+        else:
+            confidence = 'low'
+            has_audio = False
+            
+        return {
+            'has_audio': has_audio,
+            'confidence': confidence,
+            'audio_type': content_type,
+            'status': f'youtube_audio: {len(found_indicators)} indicators, {content_type}'
+        }
+
+    def _youtube_audio_error(self, e: Exception) -> Dict:
+        return {
+            'has_audio': True,  # Предполагаем наличие аудио в YouTube по умолчанию
+            'confidence': 'medium',
+            'audio_type': 'youtube_default',
+            'status': f'youtube_error_default_true: {str(e)}'
+        }
 
     def _detect_twitch_audio(self, url: str) -> Dict:
         """Enhanced Twitch audio detection"""
         try:
             response = self.session.get(url, timeout=self.timeout)
-            content = response.text.lower()
-            
-            # Определяем тип Twitch контента
-            stream_type = self._classify_twitch_content(url, content)
-            
-            # Twitch почти всегда имеет аудио
-            if stream_type == 'just_chatting':
-                return {
-                    'has_audio': True,
-                    'confidence': 'high',
-                    'audio_type': 'live_talk',
-                    'status': 'twitch_just_chatting_high_voice_probability'
-                }
-            elif stream_type == 'talk_show':
-                return {
-                    'has_audio': True,
-                    'confidence': 'high',
-                    'audio_type': 'talk_show',
-                    'status': 'twitch_talk_show'
-                }
-            elif stream_type == 'gaming_with_commentary':
-                return {
-                    'has_audio': True,
-                    'confidence': 'high',
-                    'audio_type': 'gaming_commentary',
-                    'status': 'twitch_gaming_with_voice'
-                }
-            else:  # Любой другой Twitch контент
-                return {
-                    'has_audio': True,
-                    'confidence': 'medium',
-                    'audio_type': 'twitch_stream',
-                    'status': 'twitch_default_stream'
-                }
-                
+            return self._twitch_audio_result(url, response.text.lower())
         except Exception as e:
+            return self._twitch_audio_error(e)
+
+    def _twitch_audio_result(self, url: str, content: str) -> Dict:
+        """Decide on audio presence from a lowercased Twitch page"""
+        # Определяем тип Twitch контента
+        stream_type = self._classify_twitch_content(url, content)
+        
+        # Twitch почти всегда имеет аудио
+        if stream_type == 'just_chatting':
+            return {
+                'has_audio': True,
+                'confidence': 'high',
+                'audio_type': 'live_talk',
+                'status': 'twitch_just_chatting_high_voice_probability'
+            }
+        elif stream_type == 'talk_show':
             return {
-                'has_audio': True,  # Twitch почти всегда имеет аудио
+                'has_audio': True,
                 'confidence': 'high',
-                'audio_type': 'twitch_default',
-                'status': f'twitch_error_default_true: {str(e)}'
+                'audio_type': 'talk_show',
+                'status': 'twitch_talk_show'
             }
+        elif stream_type == 'gaming_with_commentary':
+            return {
+                'has_audio': True,
+                'confidence': 'high',
+                'audio_type': 'gaming_commentary',
+                'status': 'twitch_gaming_with_voice'
+            }
+        else:  # Любой другой Twitch контент
+            return {
+                'has_audio': True,
+                'confidence': 'medium',
+                'audio_type': 'twitch_stream',
+                'status': 'twitch_default_stream'
+            }
+
+    def _twitch_audio_error(self, e: Exception) -> Dict:
+        return {
+            'has_audio': True,  # Twitch почти всегда имеет аудио
+            'confidence': 'high',
+            'audio_type': 'twitch_default',
+            'status': f'twitch_error_default_true: {str(e)}'
+        }
 
     def _classify_youtube_content(self, content: str) -> str:
         """Classify YouTube content type for better voice detection"""
-        
-        # Высокая вероятность голосового контента
-        if any(keyword in content for keyword in [
-            'podcast', 'interview', 'talk', 'discussion', 'conversation'
-        ]):
-            return 'speech_content'
-        
-        # Образовательный контент (часто голосовой)
-        elif any(keyword in content for keyword in [
-            'tutorial', 'lecture', 'explanation', 'review', 'analysis'
-        ]):
-            return 'educational_content'
-        
-        # Музыкальный контент
-        elif any(keyword in content for keyword in [
-            'music', 'song', 'album', 'artist', 'band', 'mv', 'official video'
-        ]):
-            return 'music_content'
-        
-        # Игровой контент
-        elif any(keyword in content for keyword in [
-            'gameplay', 'gaming', 'game', 'let\'s play', 'walkthrough'
-        ]):
-            return 'gaming_content'
-        
-        else:
-            return 'mixed_content'
+        return classify_youtube_content(content)
 
     def _classify_twitch_content(self, url: str, content: str) -> str:
         """Classify Twitch stream type"""
-        
-        # Just Chatting - высокая вероятность голоса
-        if 'just chatting' in content or 'justchatting' in content:
-            return 'just_chatting'
-        
-        # Talk shows и подкасты
-        elif any(keyword in content for keyword in [
-            'talk show', 'podcast', 'interview', 'discussion'
-        ]):
-            return 'talk_show'
-        
-        # Gaming с комментариями
-        elif any(keyword in content for keyword in [
-            'gaming', 'gameplay', 'playing'
-        ]) and any(keyword in content for keyword in [
-            'commentary', 'talking', 'chat'
-        ]):
-            return 'gaming_with_commentary'
-        
-        else:
-            return 'general_stream'
+        return classify_twitch_content(url, content)
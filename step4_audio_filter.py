@@ -1,5 +1,6 @@
+import re
 from urllib.parse import urlparse
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 class AudioContentFilter:
     # Только YouTube и Twitch
@@ -11,6 +12,10 @@ class AudioContentFilter:
         'www.youtube.com': 'youtube',
         'www.twitch.tv': 'twitch'
     }
+    # All platform domains in one pattern (longest first), compiled once
+    PLATFORM_DOMAIN_RE = re.compile(
+        '|'.join(re.escape(domain) for domain in sorted(AUDIO_PLATFORMS, key=len, reverse=True))
+    )
 
     def filter_audio_links(self, links: List[Dict]) -> List[Dict]:
         """Filter links for YouTube and Twitch only"""
@@ -18,18 +23,10 @@ class AudioContentFilter:
         platform_stats = {'youtube': 0, 'twitch': 0, 'filtered_out': 0}
         
         for link in links:
-            domain = urlparse(link['url']).netloc.lower()
-            found_platform = None
-            
-            for plat_domain, plat_name in self.AUDIO_PLATFORMS.items():
-                if plat_domain in domain:
-                    link['platform_type'] = plat_name
-                    results.append(link)
-                    platform_stats[plat_name] += 1
-                    found_platform = plat_name
-                    break
-            
-            if not found_platform:
+            if self.filter_link(link):
+                results.append(link)
+                platform_stats[link['platform_type']] += 1
+            else:
                 platform_stats['filtered_out'] += 1
         
         print(f"🎯 Filtered for YouTube and Twitch only:")
@@ -38,3 +35,12 @@ class AudioContentFilter:
         print(f"  ❌ Other platforms filtered out: {platform_stats['filtered_out']}")
         
         return results
+
+    def filter_link(self, link: Dict) -> Optional[Dict]:
+        """Tag a single link with its platform_type, or return None if it is not YouTube/Twitch"""
+        match = self.PLATFORM_DOMAIN_RE.search(urlparse(link['url']).netloc.lower())
+        if not match:
+            return None
+        
+        link['platform_type'] = self.AUDIO_PLATFORMS[match.group(0)]
+        return link
@@ -1,14 +1,24 @@
+import asyncio
+import aiohttp
 import requests
-from typing import List, Dict
+from typing import List, Dict, Optional
 from urllib.parse import urlparse
 
+from step4_5_audio_detector import classify_youtube_content, twitch_audio_type
+
 class VoiceContentVerifier:
-    def __init__(self, timeout=10):
+    # Fields added to each link by verification
+    RESULT_FIELDS = ('has_voice', 'voice_confidence', 'voice_type', 'verification_status')
+
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (compatible; VoiceBot/1.0)'
+    }
+
+    def __init__(self, timeout=10, concurrency=50):
         self.timeout = timeout
+        self.concurrency = concurrency  # Max in-flight page fetches for the async path
         self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (compatible; VoiceBot/1.0)'
-        })
+        self.session.headers.update(self.HEADERS)
 
         # Голосовые ключевые слова (исключаем музыкальные)
         self.voice_keywords = [
@@ -47,20 +57,86 @@ class VoiceContentVerifier:
             if platform == 'youtube':
                 voice_result = self._verify_youtube_voice(url, audio_type)
             elif platform == 'twitch':
+                if audio_type == 'platform_implied':
+                    audio_type = self._implied_twitch_audio_type(url)
                 voice_result = self._verify_twitch_voice(url, audio_type)
             else:
                 continue
 
-            # Добавляем результаты проверки голоса
-            link_data.update({
-                'has_voice': voice_result['has_voice'],
-                'voice_confidence': voice_result['confidence'],
-                'voice_type': voice_result.get('voice_type'),
-                'verification_status': voice_result['status']
-            })
-
+            self._annotate(link_data, voice_result)
             verified_links.append(link_data)
 
+        self._print_verification_summary(audio_links, verified_links)
+        return verified_links
+
+    async def verify_voice_content_async(self, audio_links: List[Dict]) -> List[Dict]:
+        """Verify voice content, fetching up to `concurrency` YouTube pages at once"""
+        
+        if not audio_links:
+            print("🔍 No audio links to verify")
+            return []
+
+        print(f"🎙️ Starting async voice verification for {len(audio_links)} YouTube/Twitch links "
+              f"({self.concurrency} in flight)...")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.HEADERS) as session:
+            results = await asyncio.gather(*[
+                self._verify_link_async(session, semaphore, link_data) for link_data in audio_links
+            ])
+
+        verified_links = [link for link in results if link]
+
+        self._print_verification_summary(audio_links, verified_links)
+        return verified_links
+
+    async def _verify_link_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                 link_data: Dict) -> Optional[Dict]:
+        """Async counterpart of the per-link verification in verify_voice_content"""
+        url = link_data.get('url', '')
+        platform = link_data.get('platform_type', 'unknown')
+        audio_type = link_data.get('audio_type', 'unknown')
+
+        if not url:
+            return None
+
+        if platform == 'youtube':
+            async with semaphore:
+                try:
+                    async with session.get(url) as response:
+                        content = (await response.text(errors='replace')).lower()
+                    voice_result = self._youtube_voice_result(content, audio_type)
+                except Exception as e:
+                    voice_result = self._youtube_voice_error(e)
+        elif platform == 'twitch':
+            if audio_type == 'platform_implied':
+                async with semaphore:
+                    try:
+                        async with session.get(url) as response:
+                            content = (await response.text(errors='replace')).lower()
+                        audio_type = twitch_audio_type(url, content)
+                    except Exception:
+                        pass  # Same as a failed stage 4.5 probe: a general stream
+            voice_result = self._verify_twitch_voice(url, audio_type)
+        else:
+            return None
+
+        self._annotate(link_data, voice_result)
+        return link_data
+
+    def _annotate(self, link_data: Dict, voice_result: Dict):
+        # Добавляем результаты проверки голоса
+        link_data.update({
+            'has_voice': voice_result['has_voice'],
+            'voice_confidence': voice_result['confidence'],
+            'voice_type': voice_result.get('voice_type'),
+            'verification_status': voice_result['status']
+        })
+
+    def _print_verification_summary(self, audio_links: List[Dict], verified_links: List[Dict]):
         # Фильтруем только подтвержденный голосовой контент
         confirmed_voice = [link for link in verified_links if link['has_voice']]
 
@@ -69,57 +145,75 @@ class VoiceContentVerifier:
         print(f"✅ Confirmed voice content: {len(confirmed_voice)}")
         print(f"❌ No voice content: {len(audio_links) - len(confirmed_voice)}")
 
-        return verified_links
-
     def _verify_youtube_voice(self, url: str, audio_type: str) -> Dict:
         """Verify voice content in YouTube videos"""
         try:
             response = self.session.get(url, timeout=self.timeout)
-            content = response.text.lower()
-
-            # Подсчет голосовых и музыкальных индикаторов
-            voice_score = sum(1 for keyword in self.voice_keywords if keyword in content)
-            music_score = sum(1 for keyword in self.music_keywords if keyword in content)
-
-            # Учитываем предварительную классификацию из аудио-детекции
-            if audio_type == 'speech_content':
-                voice_score += 3
-            elif audio_type == 'educational_content':
-                voice_score += 2
-            elif audio_type == 'music_content':
-                music_score += 3
-
-            # Финальный скор (голос минус музыка)
-            final_score = voice_score - (music_score * 0.7)
-
-            if final_score >= 3:
-                return {
-                    'has_voice': True,
-                    'confidence': 'high',
-                    'voice_type': self._determine_youtube_voice_type(content, audio_type),
-                    'status': f'youtube_voice_confirmed (score: {final_score})'
-                }
-            elif final_score >= 1:
-                return {
-                    'has_voice': True,
-                    'confidence': 'medium',
-                    'voice_type': self._determine_youtube_voice_type(content, audio_type),
-                    'status': f'youtube_voice_likely (score: {final_score})'
-                }
-            else:
-                return {
-                    'has_voice': False,
-                    'confidence': 'medium',
-                    'status': f'youtube_non_voice_content (score: {final_score})'
-                }
-
+            return self._youtube_voice_result(response.text.lower(), audio_type)
         except Exception as e:
+            return self._youtube_voice_error(e)
+
+    def _youtube_voice_result(self, content: str, audio_type: str) -> Dict:
+        """Score a lowercased YouTube page for voice vs. music content"""
+        # Links stage 4.5 passed on their URL alone were never classified; do it
+        # here from the same page so they get the usual speech/music adjustments
+        if audio_type == 'platform_implied':
+            audio_type = classify_youtube_content(content)
+        
+        # Подсчет голосовых и музыкальных индикаторов
+        voice_score = sum(1 for keyword in self.voice_keywords if keyword in content)
+        music_score = sum(1 for keyword in self.music_keywords if keyword in content)
+
+        # Учитываем предварительную классификацию из аудио-детекции
+        if audio_type == 'speech_content':
+            voice_score += 3
+        elif audio_type == 'educational_content':
+            voice_score += 2
+        elif audio_type == 'music_content':
+            music_score += 3
+
+        # Финальный скор (голос минус музыка)
+        final_score = voice_score - (music_score * 0.7)
+
+        if final_score >= 3:
+            return {
+                'has_voice': True,
+                'confidence': 'high',
+                'voice_type': self._determine_youtube_voice_type(content, audio_type),
+                'status': f'youtube_voice_confirmed (score: {final_score})'
+            }
+        elif final_score >= 1:
+            return {
+                'has_voice': True,
+                'confidence': 'medium',
+                'voice_type': self._determine_youtube_voice_type(content, audio_type),
+                'status': f'youtube_voice_likely (score: {final_score})'
+            }
+        else:
             return {
                 'has_voice': False,
-                'confidence': 'unknown',
-                'status': f'youtube_verification_error: {str(e)}'
+                'confidence': 'medium',
+                'status': f'youtube_non_voice_content (score: {final_score})'
             }
 
+    def _youtube_voice_error(self, e: Exception) -> Dict:
+        return {
+            'has_voice': False,
+            'confidence': 'unknown',
+            'status': f'youtube_verification_error: {str(e)}'
+        }
+
+    def _implied_twitch_audio_type(self, url: str) -> str:
+        """
+        Classify a Twitch link that stage 4.5 passed on its URL alone, from its
+        page, so it gets the same voice type a probed link would
+        """
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            return twitch_audio_type(url, response.text.lower())
+        except Exception:
+            return 'twitch_default'
+
     def _verify_twitch_voice(self, url: str, audio_type: str) -> Dict:
         """Verify voice content in Twitch streams"""
         
@@ -1,33 +1,221 @@
 import os
+import asyncio
 import subprocess
-import requests
-import pandas as pd
-from typing import List, Dict, Optional
-from urllib.parse import urlparse
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
 import time
 import logging
-import json
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 import re
+import string
+import zlib
+from yt_dlp import YoutubeDL
+from utils.io_utils import file_size
+
+# URL and filename patterns, compiled once at import
+_YOUTUBE_USERNAME_PATTERNS = tuple(re.compile(p) for p in (
+    r'/channel/([^/?]+)',
+    r'/user/([^/?]+)',
+    r'/c/([^/?]+)',
+    r'/@([^/?]+)',
+    r'/watch\?v=([^&]+)',
+    r'youtu\.be/([^/?]+)'
+))
+# YouTube channel pages (optionally with a tab); group 1 is the channel root
+_YOUTUBE_CHANNEL_RE = re.compile(r'^(https?://[^/]*youtube\.com/(?:@[^/?#]+|(?:channel|c|user)/[^/?#]+))(/[^?#]*)?', re.IGNORECASE)
+_YOUTUBE_VIDEO_TABS = ('/videos', '/streams', '/shorts')
+_TWITCH_USERNAME_PATTERNS = tuple(re.compile(p) for p in (
+    r'twitch\.tv/([^/?]+)',
+    r'twitch\.tv/([^/]+)/videos'
+))
+# Warning-level line ffmpeg's HTTP protocol logs for every non-2xx response
+_FFMPEG_HTTP_ERROR_RE = re.compile(r'HTTP error (\d{3})')
+# Output position lines of ffmpeg -progress (out_time_ms is also in microseconds)
+_FFMPEG_OUT_TIME_RE = re.compile(r'^out_time_(?:us|ms)=(\d+)$', re.MULTILINE)
+# Query parameters that never change which media a link points at
+_TRACKING_PARAMS = frozenset({'si', 't', 'feature', 'pp'})
+_EMPTY_STRINGS = frozenset({'nan', '', 'none', 'null'})
+_SANITIZE_UNDERSCORES = re.compile(r'_+')
+# Applied after dropping non-ASCII: whitespace -> '_', punctuation and control characters deleted
+_SANITIZE_TABLE = str.maketrans({
+    **{c: None for c in string.punctuation if c != '_'},
+    **{chr(i): None for i in (*range(32), 127)},
+    **{c: '_' for c in string.whitespace}
+})
+# Words marking a bio line or link label rather than a handle; matched as substrings
+_DESCRIPTIVE_RE = re.compile(r'check|pinned|moved|see|bio|link|follow|subscribe', re.IGNORECASE)
+
+
+def normalize_link_url(url: str) -> str:
+    """
+    Key under which links point at the same media: scheme, www./m. prefixes,
+    trailing slashes, fragments and tracking parameters are ignored; every
+    other query parameter (v=, list=, ...) is kept.
+    """
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    for prefix in ('www.', 'm.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    key = host + parsed.path.rstrip('/')
+    
+    params = sorted(
+        (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if name not in _TRACKING_PARAMS and not name.startswith('utm_')
+    )
+    if params:
+        key += '?' + urlencode(params)
+    return key
+
+
+def classify_ffmpeg_error(stderr: str) -> str:
+    """
+    Map ffmpeg stderr (captured at -loglevel warning) to the kind of failure it reports.
+    
+    The HTTP status is on the warning-level "HTTP error <code>" line; the final
+    error line only names 400/401/403/404 and folds every other 4xx (429, 410,
+    ...) into a generic message, which is treated as a retryable rate limit.
+    
+    Examples (stderr lines as printed by ffmpeg):
+    
+    >>> classify_ffmpeg_error("[https @ 0x5581c0a3c0c0] HTTP error 429 Too Many Requests\\n"
+    ...                       "https://x/a.m3u8: Server returned 4XX Client Error, but not one of 40{0,1,3,4}")
+    'rate_limited'
+    >>> classify_ffmpeg_error("Error opening input file https://x/a.m3u8.\\n"
+    ...                       "Error opening input files: Server returned 4XX Client Error, but not one of 40{0,1,3,4}")
+    'rate_limited'
+    >>> classify_ffmpeg_error("[https @ 0x5581c0a3c0c0] HTTP error 403 Forbidden\\n"
+    ...                       "https://x/videoplayback: Server returned 403 Forbidden (access denied)")
+    'url_expired'
+    >>> classify_ffmpeg_error("[https @ 0x5581c0a3c0c0] HTTP error 410 Gone\\n"
+    ...                       "https://x/videoplayback: Server returned 4XX Client Error, but not one of 40{0,1,3,4}")
+    'url_expired'
+    >>> classify_ffmpeg_error("[libmp3lame @ 0x5581c0a41d40] Error while opening encoder for output stream #0:0 - "
+    ...                       "maybe incorrect parameters such as bit_rate, rate, width or height")
+    'encoder'
+    >>> classify_ffmpeg_error("https://x/a.m3u8: Connection refused")
+    'error'
+    """
+    http_codes = set(_FFMPEG_HTTP_ERROR_RE.findall(stderr))
+    if '429' in http_codes:
+        return 'rate_limited'
+    if http_codes & {'403', '410'} or 'Server returned 403' in stderr:
+        return 'url_expired'
+    if 'Server returned 4XX Client Error' in stderr:
+        return 'rate_limited'
+    if 'encoder' in stderr.lower() or 'libmp3lame' in stderr:
+        return 'encoder'
+    return 'error'
+
+
+def encoded_duration(progress: str) -> Optional[int]:
+    """
+    Seconds of audio written, from ffmpeg's -progress output (None if absent).
+    
+    >>> encoded_duration("out_time_us=29976000\\nprogress=continue\\nout_time_us=58512000\\nprogress=end\\n")
+    58
+    >>> encoded_duration("") is None
+    True
+    """
+    times = _FFMPEG_OUT_TIME_RE.findall(progress)
+    return int(times[-1]) // 1_000_000 if times else None
+
+
+def summarize_durations(samples: List[Dict]) -> Dict:
+    """Total/average/min/max of actual_duration in seconds, from one array pass each"""
+    durations = np.fromiter(
+        (sample.get('actual_duration') or 0 for sample in samples),
+        dtype=np.float64, count=len(samples)
+    )
+    if not len(durations):
+        return {'count': 0, 'total': 0.0, 'average': 0.0, 'shortest': 0.0, 'longest': 0.0}
+    return {
+        'count': len(durations),
+        'total': float(durations.sum()),
+        'average': float(durations.mean()),
+        'shortest': float(durations.min()),
+        'longest': float(durations.max())
+    }
+
 
 class VoiceSampleExtractor:
-    def __init__(self, output_dir="voice_samples", min_duration=30, max_duration=3600, quality="192"):
+    # Fields added to each link by extract_single
+    RESULT_FIELDS = (
+        'sample_extracted', 'sample_file', 'extraction_status', 'sample_duration', 'actual_duration',
+        'sample_quality', 'processed_username', 'sample_filename', 'platform_source', 'original_username'
+    )
+    # ffmpeg runs per link: the first plus retries for rate limits, expired URLs or encoder errors
+    MAX_ENCODE_ATTEMPTS = 3
+    # Bitrate used when encoding at the configured quality fails
+    FALLBACK_QUALITY = "128"
+
+    def __init__(self, output_dir="voice_samples", min_duration=30, max_duration=3600, quality="192",
+                 max_workers=4, per_host_limit=2, metadata_workers=16, host_interval=2.0):
         self.output_dir = output_dir
         self.min_duration = min_duration  # Minimum 30 seconds
         self.max_duration = max_duration  # Maximum 1 hour (3600 seconds)
         self.quality = quality  # kbps
+        self.max_workers = max_workers  # Concurrent yt-dlp extractions
+        self.per_host_limit = per_host_limit  # Concurrent extractions against one host
+        self.host_interval = host_interval  # Min seconds between download starts on one host
         os.makedirs(output_dir, exist_ok=True)
         
-        # Set up logging
-        logging.basicConfig(level=logging.INFO)
+        # Per-host slots replace a fixed sleep between links. They are thread
+        # semaphores so one limit holds across event loops and worker threads.
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+        # host -> earliest monotonic time the next download may start there
+        self._host_next_start: Dict[str, float] = {}
+        
+        # ffmpeg input options are fixed for the extractor's lifetime, so build
+        # them once instead of on every attempt
+        self._ffmpeg_input_args = (
+            'ffmpeg', '-y',
+            # warning, not error: the specific 'HTTP error 429 ...' lines are logged at warning level
+            '-loglevel', 'warning',
+            '-reconnect', '1',
+            '-reconnect_streamed', '1',
+            '-reconnect_delay_max', '5',
+        )
+        # Metadata lookups go through an in-process YoutubeDL; instances are not
+        # thread-safe, so each worker thread keeps and reuses its own. The async
+        # path runs them on this long-lived pool (rather than asyncio.to_thread,
+        # whose threads die with each event loop) so instances and their
+        # keep-alive connections survive across links.
+        self._ydl_local = threading.local()
+        self._metadata_pool = ThreadPoolExecutor(max_workers=metadata_workers, thread_name_prefix="ytdlp-meta")
+        # url -> Future of _resolve_media, filled by prefetch_media
+        self._prefetched: Dict[str, Future] = {}
+        self._ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'skip_download': True,
+            'noplaylist': True,
+            'format': 'bestaudio/best',
+            'socket_timeout': 30
+        }
+        # Base ffmpeg timeout in seconds per 5 minutes of audio
+        self._encode_timeouts = {'youtube': 300, 'twitch': 400}
+        
+        # Per-link progress goes through logging so it is formatted lazily; the
+        # application configures handlers (see main_pipeline.py)
         self.logger = logging.getLogger(__name__)
         
         print(f"🎤 VoiceSampleExtractor initialized:")
         print(f"📁 Output directory: {output_dir}")
         print(f"⏱️  Duration range: {min_duration}s - {max_duration}s")
         print(f"🎵 Audio quality: {quality} kbps")
+        print(f"⚡ Concurrent extractions: {max_workers} ({per_host_limit} per host)")
 
     def extract_voice_samples(self, confirmed_voice_links: List[Dict]) -> List[Dict]:
         """Extract voice samples with dynamic duration (30s to 1 hour)"""
+        return asyncio.run(self.extract_voice_samples_async(confirmed_voice_links))
+
+    async def extract_voice_samples_async(self, confirmed_voice_links: List[Dict]) -> List[Dict]:
+        """Extract voice samples, running up to `max_workers` extractions at once"""
         if not confirmed_voice_links:
             print("🔍 No confirmed voice links to extract samples from")
             return []
@@ -37,287 +225,509 @@ class VoiceSampleExtractor:
         print(f"⏱️ Duration strategy: Extract maximum available (30s - 1 hour)")
         print(f"📝 Filename format: username_source_duration_timestamp.mp3")
 
-        extracted_samples = []
+        groups = self.group_duplicate_links(confirmed_voice_links)
+        unique_links = [group[0] for group in groups]
+        total = len(unique_links)
+        self.prefetch_media(unique_links)
+        semaphore = asyncio.Semaphore(self.max_workers)
         
-        for i, link_data in enumerate(confirmed_voice_links, 1):
-            url = link_data.get('url', '')
-            username = self._extract_best_username(link_data, url)
-            platform = link_data.get('platform_type', 'unknown')
-            
-            if not url:
-                print(f" ⚠️ Skipping entry {i} - no URL provided")
-                continue
+        async def bounded(link_data: Dict, index: int) -> Optional[Dict]:
+            async with semaphore:
+                return await self.extract_single_async(link_data, index, total)
+        
+        results = await asyncio.gather(
+            *[bounded(link_data, i) for i, link_data in enumerate(unique_links, 1)],
+            return_exceptions=True
+        )
+        
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.warning(" ❌ Extraction error: %s", str(result)[:100])
+        
+        extracted_samples = [link for link in self.share_group_results(groups) if link.get('sample_extracted')]
 
-            print(f"🎤 [{i}/{len(confirmed_voice_links)}] Processing @{username} ({platform})")
+        self.print_extraction_summary(extracted_samples, len(confirmed_voice_links))
+        return extracted_samples
+
+    def extract_single(self, link_data: Dict, index: int = 1, total: int = 1) -> Optional[Dict]:
+        """
+        Extract a voice sample for a single link and annotate the link in place.
+        
+        Returns:
+            The annotated link (check 'sample_extracted'), or None if it has no URL
+        """
+        return asyncio.run(self.extract_single_async(link_data, index, total))
+
+    async def extract_single_async(self, link_data: Dict, index: int = 1, total: int = 1) -> Optional[Dict]:
+        """Async variant of extract_single; yt-dlp runs as a non-blocking subprocess"""
+        url = link_data.get('url', '')
+        # One clock read per link, shared by the fallback username and the filename
+        timestamp = int(time.time())
+        username = self._extract_best_username(link_data, url, timestamp)
+        platform = link_data.get('platform_type', 'unknown')
+        
+        if not url:
+            self.logger.warning(" ⚠️ Skipping entry %s - no URL provided", index)
+            return None
+
+        # Poll rather than block a thread on the slot, so waiting links never
+        # starve the executor that the slot holders need for their probes
+        host_slot = self._host_slot(url)
+        while not host_slot.acquire(blocking=False):
+            await asyncio.sleep(0.1)
+        try:
+            self.logger.info("🎤 [%d/%d] Processing @%s (%s)", index, total, username, platform)
+            safe_username = self._sanitize_filename(username, timestamp)
+            safe_platform = platform.lower() if platform else 'unknown'
             
-            # Get optimal duration for this content
-            optimal_duration = self._get_optimal_duration(url, platform)
+            # One metadata resolve gives both the duration and the direct stream
+            # URL (in-process yt-dlp, so off the event loop)
+            prefetched = self._prefetched.pop(url, None)
+            if prefetched:
+                media = await asyncio.wrap_future(prefetched)
+            else:
+                media = await asyncio.get_running_loop().run_in_executor(
+                    self._metadata_pool, self._resolve_media, url, platform, safe_username
+                )
+            optimal_duration = self._optimal_duration(media.get('duration', 0))
             
             # Generate filename with duration info
-            safe_username = self._sanitize_filename(username)
-            safe_platform = platform.lower() if platform else 'unknown'
-            timestamp = int(time.time())
             filename = f"{safe_username}_{safe_platform}_{optimal_duration}s_{timestamp}"
             
-            extraction_result = self._extract_audio_sample(url, filename, platform, safe_username, optimal_duration)
-            
-            # Add extraction results to link data
-            link_data.update({
-                'sample_extracted': extraction_result['success'],
-                'sample_file': extraction_result.get('file_path'),
-                'extraction_status': extraction_result['status'],
-                'sample_duration': optimal_duration,
-                'actual_duration': extraction_result.get('actual_duration', optimal_duration),
-                'sample_quality': self.quality,
-                'processed_username': safe_username,
-                'sample_filename': filename + '.mp3',
-                'platform_source': safe_platform,
-                'original_username': username
-            })
-
-            if extraction_result['success']:
-                extracted_samples.append(link_data)
-                print(f" ✅ Sample saved: {filename}.mp3 ({optimal_duration}s)")
+            if 'error' in media:
+                extraction_result = {'success': False, 'status': media['error']}
             else:
-                print(f" ❌ Failed: {extraction_result['status']}")
+                await asyncio.sleep(self._reserve_host_start(url))
+                extraction_result = await self._extract_audio_sample(
+                    media, filename, platform, safe_username, optimal_duration
+                )
+        finally:
+            host_slot.release()
+        
+        # Add extraction results to link data
+        link_data.update({
+            'sample_extracted': extraction_result['success'],
+            'sample_file': extraction_result.get('file_path'),
+            'extraction_status': extraction_result['status'],
+            'sample_duration': optimal_duration,
+            'actual_duration': extraction_result.get('actual_duration', optimal_duration),
+            'sample_quality': extraction_result.get('quality', self.quality),
+            'processed_username': safe_username,
+            'sample_filename': filename + '.mp3',
+            'platform_source': safe_platform,
+            'original_username': username
+        })
 
-            time.sleep(2)  # Rate limiting
+        if extraction_result['success']:
+            self.logger.info(" ✅ Sample saved: %s.mp3 (%ss)", filename, link_data['actual_duration'])
+        else:
+            self.logger.warning(" ❌ Failed: %s", extraction_result['status'])
 
-        self._print_extraction_summary(extracted_samples, len(confirmed_voice_links))
-        return extracted_samples
+        return link_data
 
-    def _get_optimal_duration(self, url: str, platform: str) -> int:
-        """Determine optimal sample duration based on content length"""
-        try:
-            print(f" 🔍 Analyzing content duration...")
+    def extract_single_array(self, link_data: Dict, index: int = 1, total: int = 1,
+                             sample_rate: int = 16000) -> Optional[np.ndarray]:
+        """
+        In-memory variant of extract_single: annotates the link the same way but
+        returns the decoded samples (see _decode_pcm) instead of writing an MP3.
+        """
+        url = link_data.get('url', '')
+        # One clock read per link, shared by the fallback username and the filename
+        timestamp = int(time.time())
+        username = self._extract_best_username(link_data, url, timestamp)
+        platform = link_data.get('platform_type', 'unknown')
+        
+        if not url:
+            self.logger.warning(" ⚠️ Skipping entry %s - no URL provided", index)
+            return None
+
+        with self._host_slot(url):
+            self.logger.info("🎤 [%d/%d] Processing @%s (%s) in memory", index, total, username, platform)
+            safe_username = self._sanitize_filename(username, timestamp)
+            safe_platform = platform.lower() if platform else 'unknown'
             
-            # Get duration using yt-dlp
-            cmd = ['yt-dlp', '--get-duration', '--quiet', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            prefetched = self._prefetched.pop(url, None)
+            media = prefetched.result() if prefetched else self._resolve_media(url, platform, safe_username)
+            optimal_duration = self._optimal_duration(media.get('duration', 0))
             
-            if result.returncode == 0 and result.stdout.strip():
-                duration_str = result.stdout.strip()
-                total_seconds = self._parse_duration_string(duration_str)
-                
-                if total_seconds > 0:
-                    # Apply min/max constraints
-                    optimal = max(self.min_duration, min(total_seconds, self.max_duration))
-                    
-                    print(f" ⏱️ Content duration: {total_seconds}s → Using: {optimal}s")
-                    
-                    if total_seconds < self.min_duration:
-                        print(f" ⚠️ Content too short ({total_seconds}s), using minimum {self.min_duration}s")
-                    elif total_seconds > self.max_duration:
-                        print(f" ✂️ Content too long ({total_seconds}s), capping at {self.max_duration}s")
-                    
-                    return optimal
+            filename = f"{safe_username}_{safe_platform}_{optimal_duration}s_{timestamp}"
             
-            # Fallback to maximum duration
-            print(f" ⚠️ Could not determine duration, using maximum {self.max_duration}s")
-            return self.max_duration
+            samples = None
+            if 'error' in media:
+                self.logger.warning(" ❌ %s", media['error'])
+            else:
+                try:
+                    time.sleep(self._reserve_host_start(url))
+                    samples = self._decode_pcm(media, optimal_duration, sample_rate)
+                except Exception as e:
+                    self.logger.warning(" ❌ In-memory extraction error: %s", str(e)[:100])
+        
+        link_data.update({
+            'sample_extracted': samples is not None,
+            'sample_file': None,
+            'extraction_status': f'in_memory_{"success" if samples is not None else "failed"}_{safe_username}',
+            'sample_duration': optimal_duration,
+            'actual_duration': len(samples) // sample_rate if samples is not None else 0,
+            'sample_quality': 'pcm_s16le',
+            'processed_username': safe_username,
+            'sample_filename': filename + '.wav',
+            'platform_source': safe_platform,
+            'original_username': username
+        })
+
+        if samples is not None:
+            self.logger.info(" ✅ Sample decoded: %s (%ss)", filename, len(samples) // sample_rate)
+        else:
+            self.logger.warning(" ❌ Failed: in-memory extraction for @%s", safe_username)
+
+        return samples
+
+    def group_duplicate_links(self, links: List[Dict]) -> List[List[Dict]]:
+        """
+        Group links that point at the same media (see normalize_link_url), in
+        first-seen order. Only the first link of each group needs extracting;
+        share_group_results then copies its results onto the rest.
+        """
+        groups: Dict[str, List[Dict]] = {}
+        ungrouped = []
+        for link in links:
+            url = link.get('url')
+            if url:
+                groups.setdefault(normalize_link_url(url), []).append(link)
+            else:
+                # Nothing to share; extract_single reports these individually
+                ungrouped.append([link])
+        
+        duplicates = len(links) - len(groups) - len(ungrouped)
+        if duplicates:
+            print(f"♻️ {duplicates} duplicate links will reuse the sample of an identical URL")
+        return [*groups.values(), *ungrouped]
+
+    def share_group_results(self, groups: List[List[Dict]]) -> List[Dict]:
+        """
+        Copy the fields each group's first link gained during processing onto
+        its duplicates, keeping their own fields, and return all links flattened.
+        """
+        links = []
+        for first, *duplicates in groups:
+            for duplicate in duplicates:
+                duplicate.update({key: value for key, value in first.items() if key not in duplicate})
+            links.append(first)
+            links.extend(duplicates)
+        return links
+
+    def close(self):
+        """Stop the metadata pool, cancelling prefetches that were never picked up"""
+        self._metadata_pool.shutdown(wait=True, cancel_futures=True)
+        self._prefetched.clear()
+
+    def __enter__(self) -> "VoiceSampleExtractor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def prefetch_media(self, links: List[Dict]):
+        """
+        Start resolving metadata for all links on the metadata pool without waiting.
+        
+        Resolves are pure network I/O and independent, so they run well ahead of
+        the (per-host limited) downloads; extract_single picks up the results.
+        """
+        pending = [link for link in links if link.get('url') and link['url'] not in self._prefetched]
+        if not pending:
+            return
+        
+        print(f"🔍 Prefetching stream metadata for {len(pending)} links...")
+        for link in pending:
+            url = link['url']
+            nickname = self._sanitize_filename(self._extract_best_username(link, url))
+            self._prefetched[url] = self._metadata_pool.submit(
+                self._resolve_media, url, link.get('platform_type', 'unknown'), nickname
+            )
+
+    def sample_stats(self, extracted_samples: List[Dict]) -> Dict:
+        """
+        Duration totals and per-platform counts for extracted_samples.
+        
+        Always computed from the list itself, so cached hits and shared duplicate
+        rows are counted exactly as they appear in the results.
+        """
+        stats = summarize_durations(extracted_samples)
+        stats['platforms'] = Counter(sample.get('platform_source', 'unknown') for sample in extracted_samples)
+        return stats
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Semaphore limiting concurrent extractions against the URL's host"""
+        host = urlparse(url).netloc.lower()
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _reserve_host_start(self, url: str) -> float:
+        """
+        Book the next download start on the URL's host and return how long to wait.
+        
+        Starts on one host are spaced host_interval apart; other hosts are not
+        delayed, so a mixed YouTube/Twitch batch is not throttled as a whole.
+        """
+        host = urlparse(url).netloc.lower()
+        with self._host_slots_lock:
+            now = time.monotonic()
+            start = max(now, self._host_next_start.get(host, 0.0))
+            self._host_next_start[host] = start + self.host_interval
+        return start - now
+
+    def _resolve_media(self, url: str, platform: str, nickname: str) -> Dict:
+        """
+        Resolve a link to its direct audio stream with a single yt-dlp metadata call.
+        The duration comes back in the same response, so no separate duration
+        probe is spawned; when it is missing, _optimal_duration uses max_duration.
+        
+        Returns:
+            {'webpage_url', 'media_url', 'http_headers', 'duration'} or {'error': status}
+        """
+        if platform not in ('youtube', 'twitch'):
+            return {'error': f'unsupported_platform: {platform}'}
+        
+        try:
+            # Channel and playlist pages have no audio of their own; use their
+            # latest video (a full resolve would walk every entry and still
+            # return no stream URL)
+            listing_url = self._listing_url(url, platform)
+            if listing_url:
+                url = self._find_recent_video(listing_url, nickname)
+                if not url:
+                    return {'error': f'no_recent_vods_found_for_{nickname}'}
             
+            self.logger.info(" 🔍 Resolving audio stream and duration...")
+            info = self._ydl().extract_info(url, download=False) or {}
         except Exception as e:
-            print(f" ⚠️ Duration analysis failed: {str(e)[:50]}")
+            return {'error': f'{platform}_resolve_failed_{nickname}: {str(e)[:100]}'}
+        
+        if not info.get('url'):
+            return {'error': f'{platform}_no_audio_stream_{nickname}'}
+        
+        return {
+            'webpage_url': url,
+            'media_url': info['url'],
+            'http_headers': info.get('http_headers') or {},
+            'duration': int(info.get('duration') or 0) or self._parse_duration_string(info.get('duration_string') or '')
+        }
+
+    def _optimal_duration(self, total_seconds: int) -> int:
+        """Determine optimal sample duration based on content length"""
+        if total_seconds <= 0:
+            self.logger.warning(" ⚠️ Could not determine duration, using maximum %ss", self.max_duration)
             return self.max_duration
+        
+        # Apply min/max constraints
+        optimal = max(self.min_duration, min(total_seconds, self.max_duration))
+        
+        self.logger.info(" ⏱️ Content duration: %ss → Using: %ss", total_seconds, optimal)
+        
+        if total_seconds < self.min_duration:
+            self.logger.warning(" ⚠️ Content too short (%ss), using minimum %ss", total_seconds, self.min_duration)
+        elif total_seconds > self.max_duration:
+            self.logger.info(" ✂️ Content too long (%ss), capping at %ss", total_seconds, self.max_duration)
+        
+        return optimal
+
+    def _listing_url(self, url: str, platform: str) -> Optional[str]:
+        """Video listing to take the latest entry from for channel/playlist URLs, else None"""
+        if platform == 'twitch':
+            if not self._is_twitch_channel(url):
+                return None
+            return url if url.endswith('/videos') else url.rstrip('/') + '/videos'
+        
+        if urlparse(url).path.rstrip('/') == '/playlist':
+            return url
+        channel = _YOUTUBE_CHANNEL_RE.match(url)
+        if not channel:
+            return None
+        tab = (channel.group(2) or '').rstrip('/')
+        return channel.group(1) + (tab if tab in _YOUTUBE_VIDEO_TABS else '/videos')
+
+    def _is_twitch_channel(self, url: str) -> bool:
+        """True for Twitch channel URLs, as opposed to a specific VOD or clip"""
+        return '/videos/' not in url and '/clip/' not in url and 'clips.twitch.tv' not in url
+
+    def _ydl(self) -> YoutubeDL:
+        """This thread's metadata-only YoutubeDL, created on first use"""
+        ydl = getattr(self._ydl_local, 'ydl', None)
+        if ydl is None:
+            ydl = self._ydl_local.ydl = YoutubeDL(self._ydl_opts)
+        return ydl
 
     def _parse_duration_string(self, duration_str: str) -> int:
-        """Parse duration string (HH:MM:SS or MM:SS) to seconds"""
+        """Parse duration string (HH:MM:SS, MM:SS or seconds) to seconds"""
         try:
-            parts = duration_str.split(':')
-            if len(parts) == 3:  # HH:MM:SS
-                return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-            elif len(parts) == 2:  # MM:SS
-                return int(parts) * 60 + int(parts[1])
-            else:
-                return int(float(parts))  # Single number in seconds
-        except:
+            return sum(int(float(part)) * 60 ** i for i, part in enumerate(reversed(duration_str.strip().split(':'))))
+        except (ValueError, AttributeError):
             return 0
 
-    def _extract_audio_sample(self, url: str, filename: str, platform: str, nickname: str, duration: int) -> Dict:
+    async def _extract_audio_sample(self, media: Dict, filename: str, platform: str, nickname: str, duration: int) -> Dict:
         """Extract audio sample with specified duration"""
         output_path = os.path.join(self.output_dir, f"{filename}.mp3")
         
         try:
-            if platform == 'youtube':
-                return self._extract_youtube_sample(url, output_path, nickname, duration)
-            elif platform == 'twitch':
-                return self._extract_twitch_sample(url, output_path, nickname, duration)
-            else:
-                return {
-                    'success': False,
-                    'status': f'unsupported_platform: {platform}'
-                }
+            return await self._encode_sample(platform, media, output_path, nickname, duration)
         except Exception as e:
             return {
                 'success': False,
                 'status': f'extraction_error_for_{nickname}: {str(e)[:100]}'
             }
 
-    def _extract_youtube_sample(self, url: str, output_path: str, nickname: str, duration: int) -> Dict:
-        """Extract YouTube audio with dynamic duration and quality fallback"""
+    async def _encode_sample(self, platform: str, media: Dict, output_path: str,
+                             nickname: str, duration: int) -> Dict:
+        """
+        Trim and encode the resolved stream with one ffmpeg run at the configured
+        quality. ffmpeg stops reading after `duration` seconds, so only the sample
+        itself is downloaded.
         
-        # Calculate timeout based on duration (more time for longer samples)
-        timeout_multiplier = max(1, duration // 300)  # Extra time for every 5 minutes
+        A failed run is retried only when its stderr says a retry can help:
+        rate limiting backs off, an expired stream URL is re-resolved, and an
+        encoder failure drops to a lower bitrate. Anything else fails at once
+        instead of repeating the same request.
+        """
         
-        quality_options = [
-            (self.quality, 300 * timeout_multiplier),
-            ("128", 240 * timeout_multiplier),
-            ("96", 180 * timeout_multiplier),
-            ("64", 120 * timeout_multiplier)
-        ]
+        # Calculate timeout based on duration (more time for longer samples)
+        timeout = self._encode_timeouts[platform] * max(1, duration // 300)  # Extra time for every 5 minutes
+        quality = self.quality
         
-        for quality, timeout in quality_options:
+        for attempt in range(self.MAX_ENCODE_ATTEMPTS):
+            self.logger.info(" 🎧 Encoding %s %s kbps (%ss, timeout: %ss)", platform.capitalize(), quality, duration, timeout)
+            cmd = [*self._stream_input_args(media, duration),
+                   '-vn', '-c:a', 'libmp3lame', '-b:a', f'{quality}k', '-f', 'mp3',
+                   '-progress', 'pipe:1', '-nostats', output_path]
+            
             try:
-                print(f" 🎧 Trying YouTube {quality} kbps ({duration}s, timeout: {timeout}s)")
-                
-                cmd = [
-                    'yt-dlp',
-                    '--extract-audio',
-                    '--audio-format', 'mp3',
-                    '--audio-quality', quality,
-                    '--postprocessor-args', f'ffmpeg:-t {duration}',  # Dynamic duration
-                    '--output', output_path.replace('.mp3', '.%(ext)s'),
-                    '--no-playlist',
-                    '--quiet',
-                    '--no-warnings',
-                    '--ignore-errors',
-                    '--fragment-retries', '5',
-                    '--retries', '5',
-                    '--socket-timeout', '30',
-                    url
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
-                
-                if result.returncode == 0 and os.path.exists(output_path):
-                    file_size = os.path.getsize(output_path)
-                    return {
-                        'success': True,
-                        'file_path': output_path,
-                        'status': f'youtube_success_{nickname}_quality_{quality}_duration_{duration}s',
-                        'actual_duration': duration,
-                        'file_size': file_size
-                    }
-                else:
-                    print(f" ⚠️ Quality {quality} failed, trying next...")
-                    
-            except subprocess.TimeoutExpired:
-                print(f" ⏰ Timeout at {quality} kbps ({timeout}s), trying lower quality...")
-                continue
-            except Exception as e:
-                print(f" ❌ Error at {quality}: {str(e)[:50]}")
-                continue
+                returncode, stdout, stderr = await self._run_subprocess(cmd, timeout)
+            except asyncio.TimeoutError:
+                self.logger.warning(" ⏰ Timeout at %s kbps (%ss)", quality, timeout)
+                return {'success': False, 'status': f'{platform}_timeout_{nickname}_duration_{duration}s'}
+            
+            size = file_size(output_path) if returncode == 0 else None
+            if size is not None:
+                # HLS inputs skip segments they cannot fetch and still exit 0, so
+                # report what was written rather than what was asked for
+                actual_duration = encoded_duration(stdout)
+                if actual_duration is None:
+                    actual_duration = duration
+                elif actual_duration < duration - 1:
+                    self.logger.warning(" ⚠️ Sample shorter than requested: %ss of %ss", actual_duration, duration)
+                return {
+                    'success': True,
+                    'file_path': output_path,
+                    'status': f'{platform}_success_{nickname}_quality_{quality}_duration_{actual_duration}s',
+                    'actual_duration': actual_duration,
+                    'file_size': size,
+                    'quality': quality
+                }
+            
+            failure = classify_ffmpeg_error(stderr)
+            if attempt == self.MAX_ENCODE_ATTEMPTS - 1:
+                break
+            
+            if failure == 'rate_limited':
+                delay = 5 * 2 ** attempt
+                self.logger.info(" 🚦 Rate limited, retrying in %ss...", delay)
+                await asyncio.sleep(delay)
+            elif failure == 'url_expired' and media.get('webpage_url'):
+                self.logger.info(" 🔄 Stream URL rejected, re-resolving...")
+                media = await asyncio.get_running_loop().run_in_executor(
+                    self._metadata_pool, self._resolve_media, media['webpage_url'], platform, nickname
+                )
+                if 'error' in media:
+                    return {'success': False, 'status': media['error']}
+            elif failure == 'encoder' and int(quality) > int(self.FALLBACK_QUALITY):
+                self.logger.warning(" ⚠️ Encoding at %s kbps failed, retrying at %s kbps...", quality, self.FALLBACK_QUALITY)
+                quality = self.FALLBACK_QUALITY
+            else:
+                break
         
+        self.logger.warning(" ❌ ffmpeg failed (%s): %s", failure, stderr.strip()[-100:])
         return {
             'success': False,
-            'status': f'youtube_failed_all_qualities_{nickname}_duration_{duration}s'
+            'status': f'{platform}_failed_{failure}_{nickname}_duration_{duration}s'
         }
 
-    def _extract_twitch_sample(self, url: str, output_path: str, nickname: str, duration: int) -> Dict:
-        """Extract Twitch audio with dynamic duration"""
+    def _stream_input_args(self, media: Dict, duration: int) -> tuple:
+        """
+        ffmpeg arguments that read only the first `duration` seconds of the stream.
         
-        # Calculate timeout based on duration
-        timeout_multiplier = max(1, duration // 300)
-        
-        quality_options = [
-            (self.quality, 400 * timeout_multiplier),
-            ("128", 350 * timeout_multiplier),
-            ("96", 300 * timeout_multiplier),
-            ("64", 250 * timeout_multiplier)
-        ]
+        -ss/-t are input options (before -i), so ffmpeg seeks and stops on the
+        network side: HTTP range reads for progressive streams, and only the
+        needed segments for HLS playlists such as Twitch VODs.
+        """
+        return (*self._ffmpeg_input_args, *self._header_args(media),
+                '-ss', '0', '-t', str(duration), '-i', media['media_url'])
+
+    def _header_args(self, media: Dict) -> tuple:
+        """ffmpeg -headers option carrying the HTTP headers yt-dlp resolved the stream with"""
+        headers = media.get('http_headers')
+        if not headers:
+            return ()
+        return ('-headers', ''.join(f"{key}: {value}\r\n" for key, value in headers.items()))
+
+    async def _run_subprocess(self, cmd: List[str], timeout: float) -> Tuple[int, str, str]:
+        """
+        Run a command without blocking the event loop and return (returncode, stdout, stderr).
+        Kills it and raises asyncio.TimeoutError on timeout.
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        return proc.returncode, stdout.decode('utf-8', errors='replace'), stderr.decode('utf-8', errors='replace')
+
+    def _find_recent_video(self, listing_url: str, nickname: str) -> Optional[str]:
+        """Return the URL of the newest video on a channel/playlist listing, if any"""
+        self.logger.info(" 🔍 Searching recent videos for @%s...", nickname)
         
-        # Handle different Twitch URL types
-        if '/videos/' not in url and '/clip/' not in url:
-            if not url.endswith('/videos'):
-                videos_url = url.rstrip('/') + '/videos'
-                return self._try_get_recent_twitch_vod(videos_url, output_path, nickname, duration)
+        # The listing's entries are resolved lazily, so only the newest one is fetched
+        info = self._ydl().extract_info(listing_url, download=False, process=False) or {}
+        entry = next(iter(info.get('entries') or []), None)
         
-        # Direct VOD or clip URL
-        for quality, timeout in quality_options:
-            try:
-                print(f" 🎧 Trying Twitch {quality} kbps ({duration}s, timeout: {timeout}s)")
-                
-                cmd = [
-                    'yt-dlp',
-                    '--extract-audio',
-                    '--audio-format', 'mp3',
-                    '--audio-quality', quality,
-                    '--postprocessor-args', f'ffmpeg:-t {duration}',  # Dynamic duration
-                    '--output', output_path.replace('.mp3', '.%(ext)s'),
-                    '--quiet',
-                    '--no-warnings',
-                    '--ignore-errors',
-                    '--fragment-retries', '5',
-                    '--retries', '5',
-                    '--socket-timeout', '30',
-                    url
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
-                
-                if result.returncode == 0 and os.path.exists(output_path):
-                    file_size = os.path.getsize(output_path)
-                    return {
-                        'success': True,
-                        'file_path': output_path,
-                        'status': f'twitch_success_{nickname}_quality_{quality}_duration_{duration}s',
-                        'actual_duration': duration,
-                        'file_size': file_size
-                    }
-                else:
-                    print(f" ⚠️ Quality {quality} failed, trying next...")
-                    
-            except subprocess.TimeoutExpired:
-                print(f" ⏰ Timeout at {quality} kbps, trying lower quality...")
-                continue
-            except Exception as e:
-                print(f" ❌ Error at {quality}: {str(e)[:50]}")
-                continue
+        if entry:
+            entry_url = entry.get('webpage_url') or entry.get('url')
+            entry_title = (entry.get('title') or 'Unknown Title')[:30]
+            
+            if entry_url:
+                self.logger.info(" 🎬 Found recent video: %s...", entry_title)
+                return entry_url
         
-        return {
-            'success': False,
-            'status': f'twitch_failed_all_qualities_{nickname}_duration_{duration}s'
-        }
+        return None
 
-    def _try_get_recent_twitch_vod(self, videos_url: str, output_path: str, nickname: str, duration: int) -> Dict:
-        """Get recent Twitch VOD with dynamic duration"""
+    def _decode_pcm(self, media: Dict, duration: int, sample_rate: int) -> Optional[np.ndarray]:
+        """ffmpeg decodes the resolved stream to mono 16-bit PCM on stdout; nothing touches disk"""
+        cmd = [
+            *self._stream_input_args(media, duration),
+            '-vn', '-ac', '1', '-ar', str(sample_rate),
+            '-f', 's16le', 'pipe:1'
+        ]
+        timeout = 300 * max(1, duration // 300)
+        
         try:
-            print(f" 🔍 Searching recent VODs for @{nickname}...")
-            
-            cmd = [
-                'yt-dlp',
-                '--dump-json',
-                '--playlist-end', '1',
-                '--quiet',
-                '--no-warnings',
-                videos_url
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-            
-            if result.returncode == 0 and result.stdout.strip():
-                lines = [line for line in result.stdout.strip().split('\n') if line.strip()]
-                if lines:
-                    vod_info = json.loads(lines[0])
-                    vod_url = vod_info.get('webpage_url') or vod_info.get('url')
-                    vod_title = vod_info.get('title', 'Unknown Title')[:30]
-                    
-                    if vod_url:
-                        print(f" 🎬 Found recent VOD: {vod_title}...")
-                        return self._extract_twitch_sample(vod_url, output_path, nickname, duration)
-            
-            return {
-                'success': False,
-                'status': f'no_recent_vods_found_for_{nickname}'
-            }
-            
-        except Exception as e:
-            return {
-                'success': False,
-                'status': f'twitch_vod_search_failed_{nickname}: {str(e)[:100]}'
-            }
+            result = subprocess.run(cmd, capture_output=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.logger.warning(" ⏰ In-memory extraction timed out (%ss)", timeout)
+            return None
+        
+        samples = np.frombuffer(result.stdout, dtype=np.int16)
+        if result.returncode != 0 or len(samples) < sample_rate:
+            self.logger.warning(" ⚠️ In-memory extraction failed: %s", result.stderr.decode(errors='replace')[-200:])
+            return None
+        
+        return samples
 
-    def _extract_best_username(self, link_data: Dict, url: str) -> str:
+    def _extract_best_username(self, link_data: Dict, url: str, timestamp: Optional[int] = None) -> str:
         """Extract username with URL parsing priority"""
         # Priority 1: Extract from URL
         username_from_url = self._extract_username_from_url(url)
@@ -333,12 +743,12 @@ class VoiceSampleExtractor:
                 if username and not self._is_descriptive_text(username):
                     return username
         
-        # Priority 3: Generate ID from URL
+        # Priority 3: Generate ID from URL (crc32, unlike hash(), is the same in every run)
         if url:
-            url_hash = abs(hash(url)) % 10000
+            url_hash = zlib.crc32(url.encode('utf-8')) % 10000
             return f"user_{url_hash}"
         
-        return f"user_{int(time.time()) % 10000}"
+        return self._fallback_username(timestamp)
 
     def _extract_username_from_url(self, url: str) -> Optional[str]:
         """Extract username from YouTube or Twitch URL"""
@@ -347,17 +757,8 @@ class VoiceSampleExtractor:
             
         try:
             if 'youtube.com' in url or 'youtu.be' in url:
-                patterns = [
-                    r'/channel/([^/?]+)',
-                    r'/user/([^/?]+)',
-                    r'/c/([^/?]+)',
-                    r'/@([^/?]+)',
-                    r'/watch\?v=([^&]+)',
-                    r'youtu\.be/([^/?]+)'
-                ]
-                
-                for pattern in patterns:
-                    match = re.search(pattern, url)
+                for pattern in _YOUTUBE_USERNAME_PATTERNS:
+                    match = pattern.search(url)
                     if match:
                         username = match.group(1)[:20]
                         if not username.startswith('UC'):
@@ -365,13 +766,8 @@ class VoiceSampleExtractor:
                         return f"yt_{username[-8:]}"
                         
             elif 'twitch.tv' in url:
-                patterns = [
-                    r'twitch\.tv/([^/?]+)',
-                    r'twitch\.tv/([^/]+)/videos'
-                ]
-                
-                for pattern in patterns:
-                    match = re.search(pattern, url)
+                for pattern in _TWITCH_USERNAME_PATTERNS:
+                    match = pattern.search(url)
                     if match:
                         username = match.group(1)
                         if username.lower() not in ['videos', 'clips', 'collections']:
@@ -384,46 +780,43 @@ class VoiceSampleExtractor:
 
     def _is_empty_value(self, value) -> bool:
         """Check if value is empty"""
-        if value is None or pd.isna(value):
+        if value is None or (isinstance(value, float) and value != value):  # None or NaN
             return True
-        return str(value).lower().strip() in ['nan', '', 'none', 'null']
+        return str(value).lower().strip() in _EMPTY_STRINGS
 
     def _is_descriptive_text(self, text: str) -> bool:
         """Check if text is descriptive rather than username"""
         if not text or len(text) > 30:
             return True
-            
-        descriptive_words = [
-            'check', 'pinned', 'moved', 'see', 'bio', 'link', 'follow', 'subscribe'
-        ]
         
-        text_lower = text.lower()
-        word_count = sum(1 for w in descriptive_words if w in text_lower)
-        
-        return word_count >= 1 or text.count(' ') >= 2
+        return bool(_DESCRIPTIVE_RE.search(text)) or text.count(' ') >= 2
 
-    def _sanitize_filename(self, filename: str) -> str:
+    def _sanitize_filename(self, filename: str, timestamp: Optional[int] = None) -> str:
         """Clean filename for safe file system usage"""
         if not filename or self._is_empty_value(filename):
-            return f"user_{int(time.time()) % 10000}"
+            return self._fallback_username(timestamp)
             
         # Remove special characters and emojis
-        filename = re.sub(r'[^\w\s-]', '', str(filename), flags=re.UNICODE)
-        filename = filename.lower()
-        filename = re.sub(r'\s+', '_', filename)
-        filename = re.sub(r'_+', '_', filename).strip('_')
-        filename = re.sub(r'[^a-zA-Z0-9_]', '', filename)
+        filename = str(filename).lower().encode('ascii', 'ignore').decode().translate(_SANITIZE_TABLE)
+        filename = _SANITIZE_UNDERSCORES.sub('_', filename).strip('_')
         
         if len(filename) > 20:
             filename = filename[:20]
             
         if not filename or len(filename) < 2:
-            return f"user_{int(time.time()) % 10000}"
+            return self._fallback_username(timestamp)
             
         return filename
 
-    def _print_extraction_summary(self, extracted_samples: List[Dict], total_links: int):
-        """Print comprehensive extraction summary"""
+    def _fallback_username(self, timestamp: Optional[int] = None) -> str:
+        """Time-based placeholder username for links with nothing better to go on"""
+        if timestamp is None:
+            timestamp = int(time.time())
+        return f"user_{timestamp % 10000}"
+
+    def print_extraction_summary(self, extracted_samples: List[Dict], total_links: int,
+                                 stats: Optional[Dict] = None):
+        """Print comprehensive extraction summary (stats: sample_stats result, if already computed)"""
         successful = len(extracted_samples)
         failed = total_links - successful
         
@@ -437,61 +830,63 @@ class VoiceSampleExtractor:
         
         if extracted_samples:
             # Duration statistics
-            durations = [sample.get('actual_duration', 0) for sample in extracted_samples]
-            total_audio_time = sum(durations)
-            avg_duration = total_audio_time / len(durations)
+            stats = stats or self.sample_stats(extracted_samples)
             
             print(f"\n📊 DURATION STATISTICS:")
-            print(f" ⏱️ Total audio extracted: {total_audio_time} seconds ({total_audio_time/3600:.1f} hours)")
-            print(f" 📊 Average sample duration: {avg_duration:.1f} seconds")
-            print(f" ⏰ Shortest sample: {min(durations)} seconds")
-            print(f" ⏰ Longest sample: {max(durations)} seconds")
+            print(f" ⏱️ Total audio extracted: {stats['total']:.0f} seconds ({stats['total']/3600:.1f} hours)")
+            print(f" 📊 Average sample duration: {stats['average']:.1f} seconds")
+            print(f" ⏰ Shortest sample: {stats['shortest']:.0f} seconds")
+            print(f" ⏰ Longest sample: {stats['longest']:.0f} seconds")
             
-            # Platform breakdown
-            platforms = {}
-            for sample in extracted_samples:
-                platform = sample.get('platform_source', 'unknown')
-                platforms[platform] = platforms.get(platform, 0) + 1
-                
             print(f"\n🔗 PLATFORM BREAKDOWN:")
-            for platform, count in platforms.items():
+            for platform, count in stats['platforms'].items():
                 print(f" {platform}: {count} samples")
 
-    def generate_samples_report(self, extracted_samples: List[Dict], output_file: str = None) -> str:
-        """Generate comprehensive report with duration analysis"""
+    def generate_samples_report(self, extracted_samples: List[Dict], output_file: str = None,
+                                stats: Optional[Dict] = None) -> str:
+        """Generate comprehensive report with duration analysis (stats: sample_stats result, if already computed)"""
         if not output_file:
             output_file = os.path.join(self.output_dir, "enhanced_voice_samples_report.txt")
             
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("🎤 ENHANCED VOICE SAMPLES EXTRACTION REPORT\n")
-            f.write("=" * 60 + "\n\n")
-            f.write(f"Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Total samples extracted: {len(extracted_samples)}\n")
-            f.write(f"Duration range: {self.min_duration}s - {self.max_duration}s\n")
-            f.write(f"Strategy: Extract maximum available audio up to 1 hour\n")
-            f.write(f"Audio quality: {self.quality} kbps\n")
-            f.write(f"Output directory: {self.output_dir}\n\n")
+        # Build the whole report in memory and write it once
+        parts = []
+        append = parts.append
+        append("🎤 ENHANCED VOICE SAMPLES EXTRACTION REPORT\n")
+        append("=" * 60 + "\n\n")
+        append(f"Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        append(f"Total samples extracted: {len(extracted_samples)}\n")
+        append(f"Duration range: {self.min_duration}s - {self.max_duration}s\n")
+        append(f"Strategy: Extract maximum available audio up to 1 hour\n")
+        append(f"Audio quality: {self.quality} kbps\n")
+        append(f"Output directory: {self.output_dir}\n\n")
+        
+        if extracted_samples:
+            stats = stats or self.sample_stats(extracted_samples)
+            
+            append("📊 DURATION STATISTICS:\n")
+            append(f"Total audio time: {stats['total']:.0f} seconds ({stats['total']/3600:.2f} hours)\n")
+            append(f"Average duration: {stats['average']:.1f} seconds\n")
+            append(f"Shortest sample: {stats['shortest']:.0f} seconds\n")
+            append(f"Longest sample: {stats['longest']:.0f} seconds\n\n")
             
-            if extracted_samples:
-                durations = [sample.get('actual_duration', 0) for sample in extracted_samples]
-                total_time = sum(durations)
-                
-                f.write("📊 DURATION STATISTICS:\n")
-                f.write(f"Total audio time: {total_time} seconds ({total_time/3600:.2f} hours)\n")
-                f.write(f"Average duration: {total_time/len(durations):.1f} seconds\n")
-                f.write(f"Shortest sample: {min(durations)} seconds\n")
-                f.write(f"Longest sample: {max(durations)} seconds\n\n")
-                
-                f.write("📋 DETAILED SAMPLE LIST:\n")
-                f.write("-" * 40 + "\n")
-                
-                for i, sample in enumerate(extracted_samples, 1):
-                    f.write(f"{i:2d}. {sample.get('sample_filename', 'N/A')}\n")
-                    f.write(f"    User: @{sample.get('processed_username', 'unknown')}\n")
-                    f.write(f"    Platform: {sample.get('platform_source', 'unknown')}\n")
-                    f.write(f"    Duration: {sample.get('actual_duration', 0)} seconds\n")
-                    f.write(f"    File size: {sample.get('file_size', 0)//1000}KB\n")
-                    f.write(f"    URL: {sample.get('url', 'N/A')[:50]}...\n\n")
+            append("📋 DETAILED SAMPLE LIST:\n")
+            append("-" * 40 + "\n")
+            
+            for i, sample in enumerate(extracted_samples, 1):
+                append(
+                    f"{i:2d}. {sample.get('sample_filename', 'N/A')}\n"
+                    f"    User: @{sample.get('processed_username', 'unknown')}\n"
+                    f"    Platform: {sample.get('platform_source', 'unknown')}\n"
+                    f"    Duration: {sample.get('actual_duration', 0)} seconds\n"
+                    f"    File size: {sample.get('file_size', 0)//1000}KB\n"
+                    f"    URL: {sample.get('url', 'N/A')[:50]}...\n\n"
+                )
+        
+        # Write beside the target and swap it in, so a crash never leaves a truncated report
+        tmp_file = output_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(parts))
+        os.replace(tmp_file, output_file)
         
         print(f"📄 Enhanced voice samples report saved: {output_file}")
         return output_file
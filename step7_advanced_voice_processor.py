@@ -5,6 +5,7 @@ import numpy as np
 from typing import List, Dict, Tuple
 import time
 import tempfile
+import wave
 import speech_recognition as sr
 import json
 from pathlib import Path
@@ -45,6 +46,17 @@ class AdvancedVoiceProcessor:
             print(f"❌ No audio files found in: {audio_dir}")
             return []
         
+        return self.process_audio_files([str(audio_file) for audio_file in audio_files])
+
+    def process_audio_files(self, audio_files: List[str]) -> List[Dict]:
+        """Process the given audio files in place to extract voice-only segments"""
+        
+        audio_files = [Path(audio_file) for audio_file in audio_files if os.path.exists(audio_file)]
+        
+        if not audio_files:
+            print(f"❌ No audio files to process")
+            return []
+        
         print(f"🎵 Found {len(audio_files)} audio files to process")
         print(f"🎯 Processing strategy:")
         print(f"  1. Voice Activity Detection (VAD)")
@@ -75,6 +87,30 @@ class AdvancedVoiceProcessor:
         
         return results
 
+    def process_array(self, samples: np.ndarray, filename: str, sample_rate: int = 16000) -> Dict:
+        """
+        Process in-memory mono int16 samples (see NoiseReducer.denoise_array).
+        
+        VAD and speech recognition still read files, so the samples are
+        written to a single temporary WAV that is removed afterwards.
+        """
+        temp_wav = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
+        temp_wav.close()
+        
+        try:
+            with wave.open(temp_wav.name, 'wb') as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(sample_rate)
+                wav.writeframes(samples.astype(np.int16).tobytes())
+            
+            result = self._process_single_audio_file(temp_wav.name, self._extract_file_metadata(filename))
+            if result:
+                result['original_file'] = filename
+            return result
+        finally:
+            os.unlink(temp_wav.name)
+
     def _process_single_audio_file(self, audio_file: str, metadata: Dict) -> Dict:
         """Process a single audio file to extract voice-only content"""
         
@@ -2,8 +2,11 @@ import os
 import subprocess
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
-import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from utils.io_utils import file_size
 
 
 class NoiseReducer:
@@ -25,7 +28,8 @@ class NoiseReducer:
         lowpass_hz: int = 6000,
         afftdn_nr: float = 24.0,
         afftdn_nf: float = -40.0,  # FIXED: Changed from 12.0 to -40.0
-        timeout: int = 120
+        timeout: int = 120,
+        workers: Optional[int] = None
     ):
         self.output_dir = output_dir
         self.mode = mode.lower().strip()
@@ -36,6 +40,7 @@ class NoiseReducer:
         self.afftdn_nr = afftdn_nr  # Noise reduction dB
         self.afftdn_nf = afftdn_nf  # Noise floor dB (MUST BE NEGATIVE)
         self.timeout = timeout
+        self.workers = max(1, workers or os.cpu_count() or 1)
 
         self.denoised_dir = os.path.join(output_dir, "denoised_audio")
         os.makedirs(self.denoised_dir, exist_ok=True)
@@ -50,6 +55,7 @@ class NoiseReducer:
         print(f"📁 Output denoised dir: {self.denoised_dir}")
         print(f"⚙️ Mode: {self.mode}")
         print(f"🔧 Noise floor (nf): {self.afftdn_nf} dB")
+        print(f"⚡ Parallel workers: {self.workers}")
 
     def process_directory(self, input_dir: str) -> List[Dict]:
         """
@@ -71,24 +77,10 @@ class NoiseReducer:
 
         print(f"🎧 Found {len(audio_files)} WAV files for noise reduction")
 
-        results: List[Dict] = []
-        for i, audio_path in enumerate(sorted(audio_files), 1):
-            print(f"\n[{i}/{len(audio_files)}] Processing: {audio_path.name}")
-            out_path = self._build_output_path(audio_path)
-            success, status = self._denoise_file(str(audio_path), out_path)
-            results.append({
-                "input_file": str(audio_path),
-                "output_file": out_path if success else "",
-                "status": status,
-                "mode": self.mode
-            })
-
-            if success:
-                print(f"✅ Saved: {os.path.basename(out_path)}")
-            else:
-                print(f"❌ Failed: {status}")
-
-            time.sleep(0.2)
+        # The filtering runs in ffmpeg child processes, so a thread per file
+        # is enough to keep every core busy
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results: List[Dict] = list(executor.map(self.process_file, map(str, sorted(audio_files))))
 
         print("\n🎛️ Noise reduction completed")
         print(f"✅ Success: {sum(1 for r in results if r['output_file'])}")
@@ -96,37 +88,86 @@ class NoiseReducer:
         print(f"📁 Denoised files: {self.denoised_dir}")
         return results
 
+    def process_file(self, input_file: str) -> Dict:
+        """
+        Denoise a single audio file into the denoised directory.
+        Returns a result dict with an empty output_file on failure.
+        """
+        out_path = self._build_output_path(Path(input_file))
+        success, status = self._denoise_file(input_file, out_path)
+
+        if success:
+            print(f"✅ Saved: {os.path.basename(out_path)}")
+        else:
+            print(f"❌ Failed: {os.path.basename(input_file)}: {status}")
+
+        return {
+            "input_file": input_file,
+            "output_file": out_path if success else "",
+            "status": status,
+            "mode": self.mode
+        }
+
     def _build_output_path(self, audio_path: Path) -> str:
         base = audio_path.stem
         out_name = f"{base}_denoised.wav"
         return os.path.join(self.denoised_dir, out_name)
 
+    def _filter_chain(self) -> Optional[str]:
+        """ffmpeg -af chain for the selected mode (None if the noise profile is missing)"""
+        if self.mode == "quick":
+            return (
+                f"highpass=f={self.highpass_hz},"
+                f"lowpass=f={self.lowpass_hz},"
+                f"afftdn=nr={self.afftdn_nr}:nf={self.afftdn_nf}:nt=w:om=o,"
+                f"dynaudnorm=f=75:g=15:p=0.9:m=10"
+            )
+        if not os.path.exists(self.noise_profile_file):
+            return None
+        return (
+            f"highpass=f={self.highpass_hz},"
+            f"lowpass=f={self.lowpass_hz},"
+            f"afir=ir='{self.noise_profile_file}':dry=1:wet=0,"
+            f"afftdn=nr={max(self.afftdn_nr - 6, 0)}:nf={self.afftdn_nf}:nt=w:om=o,"
+            f"dynaudnorm=f=75:g=15:p=0.9:m=10"
+        )
+
+    def denoise_array(self, samples: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Denoise mono int16 PCM at self.sample_rate entirely in memory.
+        Returns the filtered samples, or None if ffmpeg fails.
+        """
+        af = self._filter_chain()
+        if af is None or samples is None or len(samples) == 0:
+            return None
+
+        pcm_args = ["-f", "s16le", "-ac", "1", "-ar", str(self.sample_rate)]
+        cmd = ["ffmpeg", "-loglevel", "error", *pcm_args, "-i", "pipe:0", "-af", af, *pcm_args, "pipe:1"]
+
+        try:
+            result = subprocess.run(cmd, input=samples.astype(np.int16).tobytes(),
+                                    capture_output=True, timeout=self.timeout)
+        except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+            print(f"⚠️ In-memory denoise failed: {e}")
+            return None
+
+        if result.returncode != 0:
+            print(f"⚠️ In-memory denoise failed: {result.stderr.decode(errors='replace')[-300:]}")
+            return None
+        return np.frombuffer(result.stdout, dtype=np.int16)
+
     def _denoise_file(self, input_file: str, output_file: str) -> Tuple[bool, str]:
         """
         Run ffmpeg with selected filter chain.
         Always outputs mono 16kHz WAV.
         """
         # Basic input checks to avoid ffmpeg on invalid files
-        if not os.path.exists(input_file) or os.path.getsize(input_file) < 1024:
+        if (file_size(input_file) or 0) < 1024:
             return False, "input_missing_or_too_small"
 
-        if self.mode == "quick":
-            af = (
-                f"highpass=f={self.highpass_hz},"
-                f"lowpass=f={self.lowpass_hz},"
-                f"afftdn=nr={self.afftdn_nr}:nf={self.afftdn_nf}:nt=w:om=o,"
-                f"dynaudnorm=f=75:g=15:p=0.9:m=10"
-            )
-        else:
-            if not os.path.exists(self.noise_profile_file):
-                return False, "noise_profile_not_found"
-            af = (
-                f"highpass=f={self.highpass_hz},"
-                f"lowpass=f={self.lowpass_hz},"
-                f"afir=ir='{self.noise_profile_file}':dry=1:wet=0,"
-                f"afftdn=nr={max(self.afftdn_nr - 6, 0)}:nf={self.afftdn_nf}:nt=w:om=o,"
-                f"dynaudnorm=f=75:g=15:p=0.9:m=10"
-            )
+        af = self._filter_chain()
+        if af is None:
+            return False, "noise_profile_not_found"
 
         cmd = [
             "ffmpeg",
@@ -152,7 +193,7 @@ class NoiseReducer:
                 
                 # Return the last part of stderr which likely contains the real error
                 return False, f"ffmpeg_error: {result.stderr[-500:]}"
-            if not os.path.exists(output_file) or os.path.getsize(output_file) < 8000:
+            if (file_size(output_file) or 0) < 8000:
                 return False, "output_file_invalid_or_too_small"
             return True, "ok"
         except subprocess.TimeoutExpired:
@@ -174,6 +215,7 @@ if __name__ == "__main__":
     parser.add_argument("--lowpass", type=int, default=6000, help="Lowpass cutoff Hz")
     parser.add_argument("--nr", type=float, default=24.0, help="afftdn noise reduction dB")
     parser.add_argument("--nf", type=float, default=-40.0, help="afftdn noise floor dB (MUST BE NEGATIVE)")
+    parser.add_argument("--workers", type=int, help="Files denoised in parallel (default: CPU count)")
     args = parser.parse_args()
 
     reducer = NoiseReducer(
@@ -184,7 +226,8 @@ if __name__ == "__main__":
         highpass_hz=args.highpass,
         lowpass_hz=args.lowpass,
         afftdn_nr=args.nr,
-        afftdn_nf=args.nf
+        afftdn_nf=args.nf,
+        workers=args.workers
     )
 
     reducer.process_directory(args.input_dir)
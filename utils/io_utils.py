@@ -1,7 +1,6 @@
 import csv
 import os
 from typing import List, Dict, Optional
-import pandas as pd
 import json
 import os
 from datetime import datetime
@@ -78,6 +77,7 @@ def read_usernames(file_path: str, username_column: Optional[str] = None) -> Lis
             return [line.strip() for line in f if line.strip()]
     
     elif file_extension == '.csv':
+        import pandas as pd  # Only needed here; keeps utils cheap to import from the step modules
         df = pd.read_csv(file_path)
         
         # Determine column to use
@@ -103,6 +103,13 @@ def read_usernames(file_path: str, username_column: Optional[str] = None) -> Lis
     else:
         raise ValueError(f"Unsupported file format: {file_extension}")
 
+def file_size(path: str) -> Optional[int]:
+    """Size of path in bytes from a single stat call, or None if it is missing"""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
 def write_results_csv(results: List[Dict], output_path: str):
     """Write results to CSV file."""
     if not results:
@@ -115,6 +122,21 @@ def write_results_csv(results: List[Dict], output_path: str):
         writer.writeheader()
         writer.writerows(results)
 
+def write_dicts_csv(rows: List[Dict], output_path: str):
+    """
+    Stream a list of dicts to CSV without building a DataFrame.
+    
+    The header is the union of all keys in first-seen order; missing
+    values are written as empty cells.
+    """
+    rows = [row for row in rows if row]  # Snapshots may contain null records
+    fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval='')
+        writer.writeheader()
+        writer.writerows(rows)
+
 def filter_existing_accounts(results: List[Dict]) -> List[Dict]:
     """Filter results to only include existing accounts."""
     return [result for result in results if result['status'] == 'exists']
@@ -0,0 +1,107 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional
+
+_DONE = object()
+
+
+class Pipeline:
+    """
+    Bounded producer/consumer pipeline.
+
+    Each stage runs in its own worker pool and reads records from a bounded
+    queue fed by the previous stage, so network-bound and CPU-bound stages
+    overlap instead of running one after another.
+
+    Example:
+        results = (Pipeline(profiles)
+                   .then_process(extract_link, workers=1)
+                   .then_process(probe_link, workers=8)
+                   .run())
+    """
+
+    def __init__(self, source: Iterable, queue_size: int = 16):
+        self.source = source
+        self.queue_size = queue_size
+        self._stages = []
+
+    def then_process(self, fn: Callable[[Any], Optional[Any]], workers: int = 1) -> "Pipeline":
+        """
+        Add a stage that maps one record to one output record.
+
+        Args:
+            fn: Called once per record; returning None drops the record
+            workers: Number of threads processing this stage concurrently
+
+        Returns:
+            The pipeline, for chaining
+        """
+        self._stages.append((fn, max(1, workers)))
+        return self
+
+    def run(self) -> List:
+        """Run all stages to completion and return the records leaving the last stage"""
+        pipes = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self._stages) + 1)]
+        errors: List[BaseException] = []
+        total_workers = sum(workers for _, workers in self._stages)
+
+        with ThreadPoolExecutor(max_workers=total_workers + 1) as executor:
+            executor.submit(self._feed, pipes[0], errors)
+            for index, (fn, workers) in enumerate(self._stages):
+                remaining = [workers]
+                lock = threading.Lock()
+                for _ in range(workers):
+                    executor.submit(
+                        self._work, fn, pipes[index], pipes[index + 1], remaining, lock, errors
+                    )
+
+            results = []
+            while True:
+                item = pipes[-1].get()
+                if item is _DONE:
+                    break
+                results.append(item)
+
+        if errors:
+            raise errors[0]
+        return results
+
+    def _feed(self, output: queue.Queue, errors: List[BaseException]):
+        """Push source records into the first pipe"""
+        try:
+            for item in self.source:
+                output.put(item)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            output.put(_DONE)
+
+    def _work(self, fn, input_pipe: queue.Queue, output_pipe: queue.Queue,
+              remaining: List[int], lock: threading.Lock, errors: List[BaseException]):
+        """Worker loop for one stage; the last worker to finish closes the output pipe"""
+        while True:
+            item = input_pipe.get()
+            if item is _DONE:
+                # Let sibling workers of this stage see the end marker too
+                input_pipe.put(_DONE)
+                break
+
+            # Keep draining after a failure so upstream stages never block
+            if errors:
+                continue
+
+            try:
+                result = fn(item)
+            except BaseException as e:
+                errors.append(e)
+                continue
+
+            if result is not None:
+                output_pipe.put(result)
+
+        with lock:
+            remaining[0] -= 1
+            last_worker = remaining[0] == 0
+        if last_worker:
+            output_pipe.put(_DONE)
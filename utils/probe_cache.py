@@ -0,0 +1,67 @@
+import hashlib
+import os
+from typing import Callable, Dict, Iterable, List, Optional
+
+import diskcache
+
+# Bump when a stage's probing logic changes so stale results are not reused
+PROBE_VERSION = 3
+
+
+def open_probe_cache(output_dir: str) -> diskcache.Cache:
+    """Open the on-disk cache of per-URL stage results under output_dir"""
+    return diskcache.Cache(os.path.join(output_dir, ".probe_cache"))
+
+
+def url_key(stage: str, *parts: str) -> str:
+    """Build a cache key from the stage name, probe version and a hash of the inputs"""
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f"{stage}:v{PROBE_VERSION}:{digest}"
+
+
+def cached_map(fn: Callable[[List[Dict]], object], items: Iterable[Dict], cache: diskcache.Cache,
+               key_fn: Callable[[Dict], str], fields: Iterable[str],
+               validate: Optional[Callable[[Dict], bool]] = None,
+               label: Optional[str] = None,
+               expire: Optional[float] = None) -> List[Dict]:
+    """
+    Annotate items with a stage's result fields, reusing cached annotations.
+
+    Items whose key is cached (and passes validate) are updated from the cache;
+    only the misses are passed to fn, which must annotate them in place. The
+    resulting fields of each miss are then stored for the next run.
+
+    Args:
+        fn: Batch function that annotates the given items in place
+        items: Link dicts to annotate
+        cache: Cache returned by open_probe_cache
+        key_fn: Maps an item to its cache key (see url_key)
+        fields: Result fields fn adds to each item
+        validate: Optional check that a cached entry is still usable
+        label: If given, print a hit/miss summary with this label
+        expire: Seconds before a stored result is dropped and re-probed (None keeps it forever)
+
+    Returns:
+        All items, annotated
+    """
+    items = list(items)
+    fields = tuple(fields)
+    misses = []
+
+    for item in items:
+        cached = cache.get(key_fn(item))
+        if cached is not None and (validate is None or validate(cached)):
+            item.update(cached)
+        else:
+            misses.append(item)
+
+    if label:
+        print(f"♻️ {label}: reused {len(items) - len(misses)} cached results, probing {len(misses)}")
+
+    if misses:
+        fn(misses)
+        for item in misses:
+            if all(field in item for field in fields):
+                cache.set(key_fn(item), {field: item[field] for field in fields}, expire=expire)
+
+    return items
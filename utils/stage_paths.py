@@ -0,0 +1,36 @@
+import os
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class StagePaths:
+    """Output locations for one pipeline run, resolved once the snapshot ID is known"""
+    profiles_csv: str
+    links_csv: str
+    audio_links_csv: str
+    audio_detected_csv: str
+    verified_voice_csv: str
+    confirmed_voice_csv: str
+    voice_samples_csv: str
+    voice_only_csv: str
+    voice_samples_dir: str
+    voice_analysis_dir: str
+
+    @classmethod
+    def for_snapshot(cls, output_dir: str, snapshot_id: str) -> "StagePaths":
+        """Build every stage path under output_dir for the given snapshot"""
+        def stage_csv(stage: str, name: str) -> str:
+            return os.path.join(output_dir, f"{stage}_snapshot_{snapshot_id}_{name}.csv")
+
+        return cls(
+            profiles_csv=stage_csv("2", "results"),
+            links_csv=stage_csv("3", "external_links"),
+            audio_links_csv=stage_csv("4", "audio_links"),
+            audio_detected_csv=stage_csv("4_5", "audio_detected"),
+            verified_voice_csv=stage_csv("5", "verified_voice"),
+            confirmed_voice_csv=stage_csv("5", "confirmed_voice"),
+            voice_samples_csv=stage_csv("6", "voice_samples"),
+            voice_only_csv=stage_csv("7", "voice_only"),
+            voice_samples_dir=os.path.join(output_dir, "voice_samples"),
+            voice_analysis_dir=os.path.join(output_dir, "voice_analysis"),
+        )